@@ -47,6 +47,14 @@ class Window:
         self.num_rays: int = int(self.fov / self.ray_density + 1)
         self.line_width: float = self.screen_width / self.num_rays
 
+        # Ray angles relative to the view direction and their fisheye correction only depend on fov and num_rays
+        self.ray_angles: List[float] = []
+        angle: float = self.fov / 2
+        for _ in range(self.num_rays):
+            self.ray_angles.append(angle)
+            angle -= self.ray_density
+        self.fisheye_corrections: List[float] = [math.cos(math.radians(angle)) for angle in self.ray_angles]
+
         # Player settings
         self.player_x: float = 200
         self.player_y: float = 200
@@ -90,11 +98,9 @@ class Window:
         self.screen.blit(self.sky_texture, (0, 0))
 
         ray_info: List[List[Union[int, float]]] = []
-        angle: float = self.fov / 2
-        for _ in range(self.num_rays):
+        for angle, correction in zip(self.ray_angles, self.fisheye_corrections):
             distance, vertical, wall_type = self.raycaster.cast_ray(self.player_x, self.player_y, self.direction + angle)
-            ray_info.append([math.cos(math.radians(angle)) * distance, vertical, wall_type])
-            angle -= self.ray_density
+            ray_info.append([correction * distance, vertical, wall_type])
 
         for i, info in enumerate(ray_info):
             brightness: float = 40_000 / info[0]
@@ -0,0 +1,51 @@
+import math
+import numpy as np
+from recording import DOWN, LEFT, RIGHT, UP
+from typing import Union
+
+
+class Agents:
+    def __init__(self, x: np.ndarray, y: np.ndarray, direction: np.ndarray, move_speed: float = 0.2,
+                 rotation_speed: float = math.radians(3)):
+        # One entry per agent, the speeds are shared or per agent
+        self.x = np.array(x, dtype=np.float64)
+        self.y = np.array(y, dtype=np.float64)
+        self.direction = np.array(direction, dtype=np.float64)
+        self.move_speed = move_speed
+        self.rotation_speed = rotation_speed
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def step(self, world_map: np.ndarray, keys: Union[int, np.ndarray]):
+        # keys holds the UP, DOWN, RIGHT and LEFT bits of every agent, applied in the order of the game loop
+        keys = np.broadcast_to(np.asarray(keys, dtype=np.uint8), self.x.shape)
+        self.move(world_map, (keys & UP) != 0, forward=True)
+        self.move(world_map, (keys & DOWN) != 0, forward=False)
+        self.rotate((keys & RIGHT) != 0, right=True)
+        self.rotate((keys & LEFT) != 0, right=False)
+
+    def move(self, world_map: np.ndarray, agents: np.ndarray, forward: bool = True):
+        # movement.move for the agents in the mask: x and y are checked one after the other, so agents slide along
+        # walls. Forward the map is probed 0.6 ahead, backward one step behind
+        speed = self.move_speed if np.ndim(self.move_speed) == 0 else self.move_speed[agents]
+        x, y = self.x[agents], self.y[agents]
+        sin_dir = np.sin(self.direction[agents])
+        cos_dir = np.cos(self.direction[agents])
+        if forward:
+            probe_x, step_x = 0.6 * cos_dir, speed * cos_dir
+            probe_y, step_y = -(0.6 * sin_dir), -(speed * sin_dir)
+        else:
+            probe_x = step_x = -(speed * cos_dir)
+            probe_y = step_y = speed * sin_dir
+
+        free = world_map[y.astype(np.intp), (x + probe_x).astype(np.intp)] == 0
+        x = np.where(free, x + step_x, x)
+        free = world_map[(y + probe_y).astype(np.intp), x.astype(np.intp)] == 0
+        y = np.where(free, y + step_y, y)
+        self.x[agents], self.y[agents] = x, y
+
+    def rotate(self, agents: np.ndarray, right: bool):
+        speed = self.rotation_speed if np.ndim(self.rotation_speed) == 0 else self.rotation_speed[agents]
+        direction = self.direction[agents] + speed if right else self.direction[agents] - speed
+        self.direction[agents] = direction % (2 * math.pi)
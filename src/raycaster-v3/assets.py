@@ -0,0 +1,97 @@
+import json
+import numpy as np
+import os
+from chunks import ChunkedMap
+from textures import TextureAtlas
+from typing import Dict, Optional, Union
+
+# File layout: magic, index length, JSON index, then page aligned raw arrays
+MAGIC = b"RCBUNDLE"
+ALIGNMENT = 4096
+
+
+def _aligned(offset: int) -> int:
+    return offset + (-offset) % ALIGNMENT
+
+
+def write_bundle(path: str, maps: Optional[Dict[str, np.ndarray]] = None,
+                 atlases: Optional[Dict[str, TextureAtlas]] = None, images: Optional[Dict[str, np.ndarray]] = None):
+    # Every asset is a set of arrays plus some metadata, keyed by the path it was loaded from
+    assets = {}
+    for name, world_map in (maps or {}).items():
+        assets[name] = ("map", {"data": world_map}, {})
+    for name, atlas in (atlases or {}).items():
+        assets[name] = ("atlas", {"texels": atlas.texels},
+                        {"num_textures": atlas.num_textures, "sizes": atlas.sizes.tolist()})
+    for name, image in (images or {}).items():
+        # Images are (row, column, rgba) so pygame.image.frombuffer can use the mapped bytes directly
+        assets[name] = ("image", {"data": image}, {})
+
+    # Offsets of all arrays relative to the start of the data section
+    index = {}
+    blobs = []
+    offset = 0
+    for name, (kind, arrays, meta) in assets.items():
+        entry = {"kind": kind, "meta": meta, "arrays": {}}
+        for part, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            entry["arrays"][part] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            blobs.append((offset, array))
+            offset = _aligned(offset + array.nbytes)
+        index[name] = entry
+
+    header = json.dumps(index).encode("utf-8")
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(np.uint64(len(header)).tobytes())
+        file.write(header)
+        for offset, array in blobs:
+            file.seek(data_start + offset)
+            file.write(array.tobytes())
+
+
+class AssetBundle:
+    def __init__(self, path: str):
+        # Only the index is read, the arrays are mapped when they are first used
+        self.path = path
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an asset bundle")
+            header_size = int(np.frombuffer(file.read(8), dtype=np.uint64)[0])
+            self.index = json.loads(file.read(header_size).decode("utf-8"))
+        self.data_start = _aligned(len(MAGIC) + 8 + header_size)
+        self.arrays: Dict[tuple, np.ndarray] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def names(self, kind: Optional[str] = None):
+        return [name for name, entry in self.index.items() if kind is None or entry["kind"] == kind]
+
+    def array(self, name: str, part: str = "data") -> np.ndarray:
+        # Read-only memory map, pages are loaded by the OS when they are touched
+        if (name, part) not in self.arrays:
+            info = self.index[name]["arrays"][part]
+            self.arrays[name, part] = np.memmap(self.path, dtype=np.dtype(info["dtype"]), mode="r",
+                                                offset=self.data_start + info["offset"], shape=tuple(info["shape"]))
+        return self.arrays[name, part]
+
+    def map(self, name: str) -> np.ndarray:
+        return self.array(name)
+
+    def atlas(self, name: str) -> TextureAtlas:
+        meta = self.index[name]["meta"]
+        return TextureAtlas(self.array(name, "texels"), meta["num_textures"], meta["sizes"])
+
+    def image(self, name: str) -> np.ndarray:
+        return self.array(name)
+
+
+def load_map(path: str, bundle: Optional[AssetBundle] = None) -> Union[np.ndarray, ChunkedMap]:
+    # Maps too big for memory are directories of chunks that are streamed from disk
+    if bundle is not None and path in bundle:
+        return bundle.map(path)
+    if os.path.isdir(path):
+        return ChunkedMap(path)
+    return np.load(path)
@@ -0,0 +1,253 @@
+import argparse
+import importlib.util
+import itertools
+import json
+import math
+import numpy as np
+import os
+import platform
+import sys
+import time
+from typing import Callable, List, Optional
+
+# Frames are rendered off screen without waiting for the display, set before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from counters import TraversalCounters  # noqa: E402
+from distance_field import chebyshev_distances  # noqa: E402
+from parallel import ParallelRenderer  # noqa: E402
+from paths import PATHS, Pose  # noqa: E402
+from profiler import profiler  # noqa: E402
+from ray_cache import RayRingCache  # noqa: E402
+from recording import InputReplay  # noqa: E402
+from renderer import Renderer  # noqa: E402
+from textures import load_atlas  # noqa: E402
+
+MAPS = ["maps/map1.npy", "maps/map2.npy", "maps/map3.npy", "maps/map4.npy"]
+TEXTURES = ["textures/textures30.npz", "textures/textures40.npz", "textures/textures50.npz",
+            "textures/textures100.npz"]
+WINDOW_SIZES = ["700x650", "350x325", "1280x720"]
+LINE_WIDTHS = [1, 2, 4]
+# auto leaves the choice between pyramid and plain DDA to the renderer
+CASTINGS = ["auto", "pyramid", "plain", "distance-field", "ray-cache"]
+# Textured frames, or the ray geometry alone, optionally as a depth image of one row per line width
+OBSERVATIONS = ["rgb", "geometry", "depth"]
+# The parallel renderer draws textured frames and casts like the renderer chooses or with the distance field only
+PARALLEL_CASTINGS = ["auto", "distance-field"]
+WARMUP_FRAMES = 3
+# Keys of a v3 result that select what was rendered, apart from the worker count
+SETTING_KEYS = ("map", "textures", "window_size", "line_width", "path", "casting", "observation")
+
+
+def measure(render_frame: Callable[[int], None], frames: int, rays_per_frame: Optional[int]) -> dict:
+    for i in range(WARMUP_FRAMES):
+        render_frame(i)
+
+    frame_times = np.empty(frames)
+    for i in range(frames):
+        start = time.perf_counter()
+        with profiler.span("frame"):
+            render_frame(i)
+        frame_times[i] = time.perf_counter() - start
+        profiler.end_frame()
+
+    total = frame_times.sum()
+    return {
+        "frames": frames,
+        "fps": frames / total,
+        "rays_per_second": rays_per_frame * frames / total if rays_per_frame else None,
+        "p50_ms": float(np.percentile(frame_times, 50) * 1000),
+        "p99_ms": float(np.percentile(frame_times, 99) * 1000),
+    }
+
+
+def bench_v3(map_path: str, texture_path: str, window_size: str, line_width: int, path: str, frames: int,
+             casting: str = "auto", counters_dir: Optional[str] = None, observation: str = "rgb",
+             workers: int = 1) -> dict:
+    world_map = np.load(map_path)
+    win_x, win_y = (int(value) for value in window_size.split("x"))
+    distance_field = chebyshev_distances(world_map) if casting == "distance-field" else None
+    counters = TraversalCounters(world_map.shape) if counters_dir else None
+    if workers > 1:
+        counters = None
+        renderer = ParallelRenderer(world_map, load_atlas(texture_path), (win_x, win_y), line_width,
+                                    workers=workers, distance_field=distance_field)
+    else:
+        renderer = Renderer(world_map, load_atlas(texture_path), (win_x, win_y), line_width,
+                            distance_field=distance_field, counters=counters,
+                            ray_cache=RayRingCache() if casting == "ray-cache" else None,
+                            occupancy={"pyramid": True, "plain": False}.get(casting))
+    # Scripted path, or the poses of a recorded game session
+    poses: List[Pose] = PATHS[path](world_map, frames) if path in PATHS else InputReplay(path).poses(world_map)
+
+    depth_rows = win_y // line_width if observation == "depth" else None
+
+    def render_frame(i: int):
+        if observation == "rgb":
+            renderer.render(*poses[i % len(poses)])
+        else:
+            renderer.observe(*poses[i % len(poses)], depth_rows)
+
+    result = {"version": "v3", "map": map_path, "textures": texture_path, "window_size": window_size,
+              "line_width": line_width, "path": path, "casting": casting, "observation": observation,
+              "workers": workers}
+    try:
+        result.update(measure(render_frame, frames, math.ceil(win_x / line_width)))
+    finally:
+        if workers > 1:
+            renderer.close()
+
+    # Traversal counters include the warmup frames
+    if counters is not None:
+        result["counters"] = counters.summary()
+        # One file per setting of the sweep, the parallel renderer keeps no counters so the worker count is always 1
+        name = "-".join([os.path.splitext(os.path.basename(map_path))[0],
+                         os.path.splitext(os.path.basename(texture_path))[0], window_size, f"lw{line_width}",
+                         os.path.basename(path), casting, observation])
+        counters.save_heatmap(os.path.join(counters_dir, name + ".npy"))
+        counters.save_heatmap(os.path.join(counters_dir, name + ".png"))
+    return result
+
+
+def add_speedups(results: List[dict]):
+    # Frame rate of every v3 result relative to the single worker run of the same settings
+    def settings(result: dict) -> tuple:
+        return tuple(value for key, value in result.items() if key in SETTING_KEYS)
+
+    single = {settings(result): result["fps"] for result in results if result.get("workers") == 1}
+    for result in results:
+        if result.get("version") == "v3" and settings(result) in single:
+            result["speedup"] = result["fps"] / single[settings(result)]
+
+
+def _load_module(name: str, path: str):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_v1(path: str, frames: int) -> dict:
+    # v1 loads its images relative to its own directory and imports its raycaster module by name
+    v1_dir = os.path.abspath("../raycaster-v1")
+    cwd = os.getcwd()
+    sys.path.insert(0, v1_dir)
+    os.chdir(v1_dir)
+    try:
+        window = _load_module("window_v1", "window.py").Window()
+        start_x, start_y, start_direction = window.player_x, window.player_y, window.direction
+
+        def render_frame(i: int):
+            # Directions are in degrees, walking turns around where it would leave the map
+            if path == "spin":
+                window.direction = start_direction + 360 * i / frames
+            elif i == 0:
+                window.player_x, window.player_y, window.direction = start_x, start_y, start_direction
+            else:
+                x, y = window.raycaster.move(window.player_x, window.player_y, window.direction)
+                if (x, y) == (window.player_x, window.player_y):
+                    window.direction += 90
+                window.player_x, window.player_y = x, y
+            window.render()
+
+        result = {"version": "v1", "path": path, "window_size": f"{window.screen_width}x{window.screen_height}"}
+        result.update(measure(render_frame, frames, window.num_rays))
+    finally:
+        os.chdir(cwd)
+        sys.path.remove(v1_dir)
+    return result
+
+
+def bench_v2(path: str, frames: int) -> dict:
+    # v2 draws the top down map only, it casts no rays
+    v2 = _load_module("raycaster_v2", "../raycaster-v2/raycaster.py")
+    spin_steps = math.ceil(360 / v2.player.SPINNING_SPEED / frames)
+
+    def render_frame(i: int):
+        if path == "spin":
+            for _ in range(spin_steps):
+                v2.player.spin(True, False)
+        else:
+            v2.player.walk(True, False)
+            v2.player.spin(True, False)
+        v2.map_object.draw_2d()
+
+    result = {"version": "v2", "path": path, "window_size": f"{v2.WIN_X}x{v2.WIN_Y}"}
+    result.update(measure(render_frame, frames, None))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render scripted camera paths and report frame times as JSON")
+    parser.add_argument("--versions", nargs="+", default=["v1", "v2", "v3"], choices=["v1", "v2", "v3"])
+    parser.add_argument("--maps", nargs="+", default=MAPS)
+    parser.add_argument("--textures", nargs="+", default=TEXTURES)
+    parser.add_argument("--window-sizes", nargs="+", default=WINDOW_SIZES)
+    parser.add_argument("--line-widths", nargs="+", type=int, default=LINE_WIDTHS)
+    parser.add_argument("--paths", nargs="+", default=list(PATHS), choices=list(PATHS))
+    parser.add_argument("--castings", nargs="+", default=CASTINGS[:1], choices=CASTINGS)
+    parser.add_argument("--observations", nargs="+", default=OBSERVATIONS[:1], choices=OBSERVATIONS)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1],
+                        help="Worker process counts, more than one renders with the parallel renderer")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--replay", help="Recorded game session to render instead of the scripted paths")
+    parser.add_argument("--counters", help="Directory for the traversal heatmaps, adds the counters to the results")
+    parser.add_argument("--output", help="JSON file, printed if not given")
+    parser.add_argument("--trace", help="Chrome trace file with the stages of every frame")
+    args = parser.parse_args()
+    profiler.enabled = args.trace is not None
+    if args.counters:
+        os.makedirs(args.counters, exist_ok=True)
+
+    # A recording brings its own map and frames
+    paths = args.paths
+    if args.replay:
+        replay = InputReplay(args.replay)
+        args.maps, paths, args.frames = [replay.map_path], [args.replay], len(replay.ticks)
+        args.versions = ["v3"]
+
+    results = []
+    if "v3" in args.versions:
+        for map_path in args.maps:
+            for texture_path in args.textures:
+                for window_size in args.window_sizes:
+                    for line_width in args.line_widths:
+                        for path in paths:
+                            for casting, observation, workers in itertools.product(
+                                    args.castings, args.observations, args.workers):
+                                if workers > 1 and (casting not in PARALLEL_CASTINGS or observation != "rgb"):
+                                    continue
+                                results.append(bench_v3(map_path, texture_path, window_size, line_width, path,
+                                                        args.frames, casting, args.counters, observation, workers))
+                                print(json.dumps(results[-1]), file=sys.stderr)
+        add_speedups(results)
+
+    # The old versions have a fixed map and window and no wall hugging
+    for version, bench in (("v1", bench_v1), ("v2", bench_v2)):
+        if version in args.versions:
+            for path in args.paths:
+                if path != "wall-hug":
+                    results.append(bench(path, args.frames))
+                    print(json.dumps(results[-1]), file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    if args.trace:
+        profiler.export_chrome_trace(args.trace)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
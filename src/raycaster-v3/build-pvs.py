@@ -0,0 +1,24 @@
+import argparse
+import glob
+import numpy as np
+import time
+from pvs import load_pvs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the potentially visible set of every map next to it")
+    parser.add_argument("--maps", nargs="+", default=sorted(glob.glob("maps/*.npy")))
+    parser.add_argument("--samples", type=int, default=4, help="Sample points per cell and axis")
+    parser.add_argument("--rays", type=int, default=512, help="Rays per sample point")
+    parser.add_argument("--workers", type=int, help="Build processes, all cores if not given")
+    args = parser.parse_args()
+
+    for map_path in args.maps:
+        start = time.perf_counter()
+        pvs = load_pvs(map_path, np.load(map_path), args.samples, args.rays, args.workers)
+        print(f"{map_path}: {pvs.bits.nbytes} bytes of visible cells for {pvs.offsets.size} cells, "
+              f"{time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
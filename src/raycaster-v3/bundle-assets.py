@@ -0,0 +1,19 @@
+import glob
+import numpy as np
+from PIL import Image
+from assets import write_bundle
+from textures import load_atlas
+
+# Backgrounds are stored already scaled to the default window of the raycasters
+WINDOW_SIZE = (700, 650)
+background_size = (WINDOW_SIZE[0], WINDOW_SIZE[1] // 2)
+
+maps = {path: np.load(path) for path in sorted(glob.glob("maps/*.npy"))}
+atlases = {path: load_atlas(path) for path in sorted(glob.glob("textures/*.npz"))}
+images = {
+    "images/floor.png": np.array(Image.open("images/floor.png").convert("RGBA").resize(background_size)),
+    "images/sky.png": np.array(Image.open("images/sky.png").convert("RGBA").resize(background_size)),
+    "images/logo.png": np.array(Image.open("images/logo.png").convert("RGBA")),
+}
+
+write_bundle("assets.bundle", maps, atlases, images)
@@ -0,0 +1,47 @@
+import math
+import numpy as np
+from functools import lru_cache
+from typing import Optional, Tuple
+
+
+@lru_cache(maxsize=16)
+def camera_plane(field_of_view: float, num_rays: int, first_ray: int, last_ray: int
+                 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Angle of every ray relative to the view direction
+    ray_density = field_of_view / (num_rays - 1)
+    offsets = np.arange(first_ray, last_ray) * ray_density - field_of_view / 2
+
+    # Rotating by these turns the view direction into the ray directions, cos also removes the fisheye effect
+    cos_offsets = np.cos(offsets)
+    sin_offsets = np.sin(offsets)
+    for table in (offsets, cos_offsets, sin_offsets):
+        table.flags.writeable = False
+    return offsets, cos_offsets, sin_offsets
+
+
+class Camera:
+    def __init__(self, field_of_view: float, num_rays: int, first_ray: int = 0, last_ray: Optional[int] = None):
+        self.field_of_view = self.num_rays = self.first_ray = self.last_ray = None
+        self.configure(field_of_view, num_rays, first_ray, last_ray)
+
+    def configure(self, field_of_view: float, num_rays: int, first_ray: int = 0, last_ray: Optional[int] = None):
+        last_ray = num_rays if last_ray is None else last_ray
+        if (field_of_view, num_rays, first_ray, last_ray) == \
+                (self.field_of_view, self.num_rays, self.first_ray, self.last_ray):
+            return
+
+        # The tables only change with field of view and resolution
+        self.field_of_view = field_of_view
+        self.num_rays = num_rays
+        self.first_ray = first_ray
+        self.last_ray = last_ray
+        self.ray_density = field_of_view / (num_rays - 1)
+        self.offsets, self.fisheye, self.sin_offsets = camera_plane(field_of_view, num_rays, first_ray, last_ray)
+
+    def ray_vectors(self, direction: float) -> Tuple[np.ndarray, np.ndarray]:
+        # Map rows grow downwards, so the y component is -sin(direction + offset)
+        cos_direction = math.cos(direction)
+        sin_direction = math.sin(direction)
+        dir_x = cos_direction * self.fisheye - sin_direction * self.sin_offsets
+        dir_y = -(sin_direction * self.fisheye + cos_direction * self.sin_offsets)
+        return dir_x, dir_y
@@ -0,0 +1,214 @@
+import numpy as np
+from counters import TraversalCounters
+from occupancy import OccupancyPyramid
+from typing import NamedTuple, Optional, Union
+
+
+class RayHits(NamedTuple):
+    ray_length: np.ndarray  # Euclidean length of every ray up to its wall
+    side: np.ndarray        # 0 = horizontal grid line hit, 1 = vertical grid line hit
+    wall_type: np.ndarray   # Map value of the wall block that was hit
+    hit_x: np.ndarray       # Map coordinates of the intersection
+    hit_y: np.ndarray
+    steps: np.ndarray       # Loop iterations every ray needed, one per block without an occupancy pyramid
+
+
+def cast_rays(world_map: np.ndarray, player_x: float, player_y: float, ray_directions: np.ndarray) -> RayHits:
+    # Map rows grow downwards, so a positive angle points to a smaller y
+    ray_directions = np.asarray(ray_directions, dtype=np.float64)
+    return cast_ray_vectors(world_map, player_x, player_y, np.cos(ray_directions), -np.sin(ray_directions))
+
+
+def cast_ray_vectors(world_map: np.ndarray, player_x: Union[float, np.ndarray], player_y: Union[float, np.ndarray],
+                     dir_x: np.ndarray, dir_y: np.ndarray, occupancy: Optional[OccupancyPyramid] = None,
+                     distance_field: Optional[np.ndarray] = None,
+                     counters: Optional[TraversalCounters] = None,
+                     max_length: Optional[Union[float, np.ndarray]] = None) -> RayHits:
+    # The rays start at one position, or each at its own if player_x and player_y are arrays. Rays that get to
+    # max_length before a wall stop there with wall type 0, e.g. at the target of a line of sight
+    num_rays = len(dir_x)
+    ray_length = np.zeros(num_rays)
+    side = np.zeros(num_rays, dtype=np.int8)
+    wall_type = np.zeros(num_rays, dtype=np.intp)
+    steps = np.zeros(num_rays, dtype=np.intp)
+
+    # Ray length needed to cross one block in x and in y direction
+    with np.errstate(divide="ignore"):
+        delta_x = np.abs(1 / dir_x)
+        delta_y = np.abs(1 / dir_y)
+
+    # Step direction and ray length up to the first grid line
+    block_x = np.asarray(player_x).astype(np.intp)
+    block_y = np.asarray(player_y).astype(np.intp)
+    step_x = np.where(dir_x > 0, 1, -1)
+    step_y = np.where(dir_y > 0, 1, -1)
+    # Axis-aligned rays never reach a grid line of the other axis, their 0 * inf is replaced
+    with np.errstate(invalid="ignore"):
+        side_x = np.where(dir_x == 0, np.inf,
+                          np.where(dir_x > 0, block_x + 1 - player_x, player_x - block_x) * delta_x)
+        side_y = np.where(dir_y == 0, np.inf,
+                          np.where(dir_y > 0, block_y + 1 - player_y, player_y - block_y) * delta_y)
+
+    # Rays walk through the flattened map, a step in y skips a whole row
+    if isinstance(world_map, np.ndarray):
+        cells_flat = np.ascontiguousarray(world_map).ravel()
+        row_stride = world_map.shape[1]
+        first_block = block_y * row_stride + block_x
+    else:
+        # Other map stores are read by (y, x), rows are padded so rays can leave the map at the sides
+        cells_flat = None
+        row_stride = world_map.shape[1] + 2
+        first_block = block_y * row_stride + block_x + 1
+    step_y = step_y * row_stride
+
+    # The pyramid is indexed like the flattened map, other map stores always step block by block
+    skip_levels = occupancy.skip_flat if occupancy is not None and cells_flat is not None else None
+    if skip_levels is not None:
+        moves_x = step_x > 0
+        moves_y = step_y > 0
+        with np.errstate(divide="ignore"):
+            # Axes the ray never moves along add nothing when it leaps
+            leap_x = np.where(np.isfinite(delta_x), delta_x, 0)
+            leap_y = np.where(np.isfinite(delta_y), delta_y, 0)
+
+    # So is the distance field, with it rays far from walls jump ahead instead of stepping
+    distances_flat = None
+    if distance_field is not None and cells_flat is not None:
+        distances_flat = np.ascontiguousarray(distance_field).ravel()
+        ray_dir_x, ray_dir_y = dir_x, dir_y
+        origin_x = np.broadcast_to(player_x, num_rays)
+        origin_y = np.broadcast_to(player_y, num_rays)
+        travelled = np.zeros(num_rays)
+
+        # Ray length per cell of distance, a bit short so a jump never ends on the border of a wall
+        jump_length = (1 - 1e-9) / np.maximum(np.abs(dir_x), np.abs(dir_y))
+
+    # State of the rays, finished rays stay on their wall block until the arrays are compacted
+    active = np.arange(num_rays)
+    alive = np.ones(num_rays, dtype=bool)
+    ray_block = np.full(num_rays, first_block)
+    remaining = num_rays
+    iteration = 0
+    if max_length is not None:
+        max_length = np.broadcast_to(np.asarray(max_length, dtype=np.float64), num_rays).copy()
+
+    # Advance all rays by one block per iteration
+    while remaining:
+        iteration += 1
+        moving = alive
+        if distances_flat is not None:
+            # All cells closer than the distance of the ray's cell are free, so the ray jumps that far
+            # and the DDA restarts from the block it lands in
+            clearance = distances_flat[ray_block] - 1
+            jumping = (clearance > 0) & alive
+            if jumping.any():
+                moving = alive & ~jumping
+                travelled[jumping] += clearance[jumping] * jump_length[jumping]
+                jump_x, jump_y = ray_dir_x[jumping], ray_dir_y[jumping]
+                start_x, start_y = origin_x[jumping], origin_y[jumping]
+                landed_x = np.floor(start_x + jump_x * travelled[jumping])
+                landed_y = np.floor(start_y + jump_y * travelled[jumping])
+                ray_block[jumping] = (landed_y * row_stride + landed_x).astype(np.intp)
+
+                # Rounding can land a ray that runs along a grid line on the side it already left. Its next grid
+                # line then lies behind it, the ray crosses it where it is instead of going back
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    side_x[jumping] = np.maximum(
+                        np.where(jump_x == 0, np.inf, (landed_x + (jump_x > 0) - start_x) / jump_x), travelled[jumping])
+                    side_y[jumping] = np.maximum(
+                        np.where(jump_y == 0, np.inf, (landed_y + (jump_y > 0) - start_y) / jump_y), travelled[jumping])
+
+        if max_length is not None:
+            last_block = ray_block.copy()
+
+        if skip_levels is None:
+            horizontal = side_y < side_x
+            length = np.minimum(side_x, side_y)
+            np.add(ray_block, np.where(horizontal, step_y, step_x), out=ray_block, where=moving)
+            np.add(side_y, delta_y, out=side_y, where=horizontal & moving)
+            np.add(side_x, delta_x, out=side_x, where=~horizontal & moving)
+        else:
+            # Leap out of the largest empty block around the ray, a single block next to walls
+            cell_y, cell_x = np.divmod(ray_block, row_stride)
+            block_mask = (1 << skip_levels[ray_block]) - 1
+            lines_x = np.where(moves_x, block_mask - (cell_x & block_mask), cell_x & block_mask)
+            lines_y = np.where(moves_y, block_mask - (cell_y & block_mask), cell_y & block_mask)
+            exit_x = side_x + lines_x * leap_x
+            exit_y = side_y + lines_y * leap_y
+            horizontal = exit_y < exit_x
+            length = np.minimum(exit_x, exit_y)
+
+            # Grid lines of the other axis crossed before the exit, ties go to x like a single step does
+            with np.errstate(invalid="ignore", divide="ignore"):
+                crossed_x = np.fmin(np.fmax(np.floor((exit_y - side_x) / delta_x) + 1, 0), lines_x)
+                crossed_y = np.fmin(np.fmax(np.ceil((exit_x - side_y) / delta_y), 0), lines_y)
+            crossed_x = np.where(horizontal, crossed_x, lines_x + 1).astype(np.intp)
+            crossed_y = np.where(horizontal, lines_y + 1, crossed_y).astype(np.intp)
+            np.add(ray_block, crossed_x * step_x + crossed_y * step_y, out=ray_block, where=moving)
+            np.add(side_x, crossed_x * leap_x, out=side_x, where=moving)
+            np.add(side_y, crossed_y * leap_y, out=side_y, where=moving)
+        if distances_flat is not None:
+            # Never backwards, so every jump starts further along the ray
+            np.maximum(travelled, length, out=travelled, where=moving)
+
+        if max_length is not None:
+            # The block the ray steps into begins at or beyond its end, it may lie outside of the map and is never
+            # read. The ray stays on its last block
+            reached = (length >= max_length) & alive
+            if reached.any():
+                done = active[reached]
+                ray_length[done] = max_length[reached]
+                side[done] = ~horizontal[reached]
+                steps[done] = iteration
+                ray_block[reached] = last_block[reached]
+                alive &= ~reached
+                remaining -= len(done)
+
+        if counters is not None:
+            counters.visit(ray_block[alive])
+            if skip_levels is None:
+                horizontal_steps = np.count_nonzero(horizontal & moving)
+                counters.cross(horizontal_steps, np.count_nonzero(moving) - horizontal_steps)
+            else:
+                counters.cross(crossed_y[moving].sum(), crossed_x[moving].sum())
+
+        # Rays that hit a wall are stored and frozen
+        if cells_flat is not None:
+            cells = cells_flat[ray_block]
+        else:
+            cell_y, cell_x = np.divmod(ray_block, row_stride)
+            cells = world_map[cell_y, cell_x - 1]
+        hit = (cells != 0) & alive
+        if hit.any():
+            done = active[hit]
+            ray_length[done] = length[hit]
+            side[done] = ~horizontal[hit]
+            wall_type[done] = cells[hit]
+            steps[done] = iteration
+            alive &= ~hit
+            remaining -= len(done)
+
+            # Drop finished rays once they make up most of the arrays
+            if remaining * 2 < len(active):
+                active = active[alive]
+                ray_block = ray_block[alive]
+                side_x, side_y = side_x[alive], side_y[alive]
+                delta_x, delta_y = delta_x[alive], delta_y[alive]
+                step_x, step_y = step_x[alive], step_y[alive]
+                if skip_levels is not None:
+                    moves_x, moves_y = moves_x[alive], moves_y[alive]
+                    leap_x, leap_y = leap_x[alive], leap_y[alive]
+                if distances_flat is not None:
+                    ray_dir_x, ray_dir_y = ray_dir_x[alive], ray_dir_y[alive]
+                    origin_x, origin_y = origin_x[alive], origin_y[alive]
+                    travelled, jump_length = travelled[alive], jump_length[alive]
+                if max_length is not None:
+                    max_length = max_length[alive]
+                alive = alive[alive]
+
+    if counters is not None:
+        counters.finish_cast(steps, wall_type, row_stride, 0 if cells_flat is not None else 1)
+
+    hit_x = player_x + dir_x * ray_length
+    hit_y = player_y + dir_y * ray_length
+    return RayHits(ray_length, side, wall_type, hit_x, hit_y, steps)
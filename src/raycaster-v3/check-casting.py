@@ -0,0 +1,99 @@
+import argparse
+import glob
+import math
+import numpy as np
+import signal
+import sys
+from caster import RayHits, cast_ray_vectors
+from distance_field import chebyshev_distances
+from occupancy import OccupancyPyramid
+from visibility import LineOfSight
+
+
+def _timeout(signum, frame):
+    raise TimeoutError("cast did not finish")
+
+
+def grid_line_rays(world_map: np.ndarray, rays: int, rng: np.random.Generator):
+    # Rays from free cells that start on grid lines or corners, axis aligned or nearly so, where rounding is tightest
+    free_y, free_x = np.nonzero(world_map == 0)
+    cells = rng.integers(len(free_x), size=rays)
+    start_x = free_x[cells] + np.choose(rng.integers(3, size=rays), [0.0, 0.5, rng.random(rays)])
+    start_y = free_y[cells] + np.choose(rng.integers(3, size=rays), [0.0, 0.5, rng.random(rays)])
+    angles = rng.integers(8, size=rays) * math.pi / 4 + rng.choice([0.0, 1e-12, -1e-12, 1e-6], size=rays)
+    return start_x, start_y, np.cos(angles), -np.sin(angles)
+
+
+def _on_corner(hits: RayHits) -> np.ndarray:
+    return np.isclose(hits.hit_x, np.round(hits.hit_x), rtol=0, atol=1e-9) \
+        & np.isclose(hits.hit_y, np.round(hits.hit_y), rtol=0, atol=1e-9)
+
+
+def compare(name: str, expected: RayHits, hits: RayHits) -> int:
+    # A ray exactly through the corner between two walls may pass or stop there, either is right
+    wrong = ~np.isclose(hits.ray_length, expected.ray_length, rtol=0, atol=1e-9) \
+        | (hits.wall_type != expected.wall_type)
+    wrong &= ~(_on_corner(hits) | _on_corner(expected))
+    if wrong.any():
+        print(f"  {name}: {np.count_nonzero(wrong)} rays differ from plain DDA", file=sys.stderr)
+    return int(np.count_nonzero(wrong))
+
+
+def check_line_of_sight(world_map: np.ndarray, rays: int, rng: np.random.Generator) -> int:
+    # Without its wall border a map must see the same, cells beyond its edge count as walls and no ray may run off it
+    height, width = world_map.shape
+    if not (world_map[[0, -1]].all() and world_map[:, [0, -1]].all()):
+        return 0
+    source_x, target_x = rng.random((2, rays)) * width
+    source_y, target_y = rng.random((2, rays)) * height
+    expected = LineOfSight(world_map).query(source_x, source_y, target_x, target_y)
+    result = LineOfSight(np.ascontiguousarray(world_map[1:-1, 1:-1])).query(source_x - 1, source_y - 1,
+                                                                            target_x - 1, target_y - 1)
+    wrong = (result.visible != expected.visible) \
+        | ~np.isclose(result.distance, expected.distance, rtol=0, atol=1e-6)
+    if wrong.any():
+        print(f"  borderless line of sight: {np.count_nonzero(wrong)} queries differ", file=sys.stderr)
+    return int(np.count_nonzero(wrong))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that all ways of casting finish and agree with plain DDA, "
+                                                 "also on maps without a wall border")
+    parser.add_argument("--maps", nargs="+", default=sorted(glob.glob("maps/*.npy")))
+    parser.add_argument("--rays", type=int, default=20000)
+    parser.add_argument("--timeout", type=int, default=60, help="Seconds a cast may take before it counts as hung")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    signal.signal(signal.SIGALRM, _timeout)
+
+    failures = 0
+    for map_path in args.maps:
+        world_map = np.load(map_path)
+        print(map_path, file=sys.stderr)
+        start_x, start_y, dir_x, dir_y = grid_line_rays(world_map, args.rays, np.random.default_rng(args.seed))
+        expected = cast_ray_vectors(world_map, start_x, start_y, dir_x, dir_y)
+        for name, kwargs in (("pyramid", {"occupancy": OccupancyPyramid(world_map)}),
+                             ("distance-field", {"distance_field": chebyshev_distances(world_map)})):
+            signal.alarm(args.timeout)
+            try:
+                failures += compare(name, expected, cast_ray_vectors(world_map, start_x, start_y, dir_x, dir_y,
+                                                                     **kwargs))
+            except TimeoutError:
+                print(f"  {name}: hung", file=sys.stderr)
+                failures += 1
+            finally:
+                signal.alarm(0)
+
+        signal.alarm(args.timeout)
+        try:
+            failures += check_line_of_sight(world_map, args.rays, np.random.default_rng(args.seed))
+        except (IndexError, TimeoutError) as error:
+            print(f"  borderless line of sight: {error!r}", file=sys.stderr)
+            failures += 1
+        finally:
+            signal.alarm(0)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
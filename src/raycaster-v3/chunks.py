@@ -0,0 +1,105 @@
+import json
+import numpy as np
+import os
+from collections import OrderedDict
+from typing import Tuple
+
+INDEX_FILE = "index.json"
+
+
+def _chunk_file(path: str, chunk_y: int, chunk_x: int) -> str:
+    return os.path.join(path, f"chunk_{chunk_y}_{chunk_x}.npy")
+
+
+def write_chunked_map(path: str, world_map: np.ndarray, chunk_size: int = 64):
+    # world_map may be a np.memmap, it is read one tile at a time
+    os.makedirs(path, exist_ok=True)
+    height, width = world_map.shape
+    for chunk_y in range(0, height, chunk_size):
+        for chunk_x in range(0, width, chunk_size):
+            chunk = np.zeros((chunk_size, chunk_size), dtype=world_map.dtype)
+            tile = world_map[chunk_y:chunk_y + chunk_size, chunk_x:chunk_x + chunk_size]
+            chunk[:tile.shape[0], :tile.shape[1]] = tile
+
+            # Empty chunks are not stored
+            if chunk.any():
+                np.save(_chunk_file(path, chunk_y // chunk_size, chunk_x // chunk_size), chunk)
+
+    with open(os.path.join(path, INDEX_FILE), "w") as file:
+        json.dump({"shape": [height, width], "chunk_size": chunk_size, "dtype": world_map.dtype.str}, file)
+
+
+class ChunkedMap:
+    def __init__(self, path: str, memory_budget: int = 64 * 1024 * 1024, outside: int = 1):
+        with open(os.path.join(path, INDEX_FILE)) as file:
+            index = json.load(file)
+        self.path = path
+        self.shape: Tuple[int, int] = tuple(index["shape"])
+        self.chunk_size: int = index["chunk_size"]
+        self.dtype = np.dtype(index["dtype"])
+        self.ndim = 2
+
+        # Cells outside of the map read as this value, by default a wall
+        self.outside = outside
+
+        # Resident chunks, least recently used first
+        self.chunks: OrderedDict = OrderedDict()
+        chunk_bytes = self.chunk_size * self.chunk_size * self.dtype.itemsize
+        self.max_chunks = max(1, memory_budget // chunk_bytes)
+        self.empty_chunk = np.zeros((self.chunk_size, self.chunk_size), dtype=self.dtype)
+        self.loads = 0
+
+    def chunk(self, chunk_y: int, chunk_x: int) -> np.ndarray:
+        key = (chunk_y, chunk_x)
+        if key in self.chunks:
+            self.chunks.move_to_end(key)
+            return self.chunks[key]
+
+        # Chunks that were not stored are empty
+        file = _chunk_file(self.path, chunk_y, chunk_x)
+        chunk = np.load(file) if os.path.exists(file) else self.empty_chunk
+        self.loads += 1
+
+        self.chunks[key] = chunk
+        if len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        return chunk
+
+    def prefetch(self, x: float, y: float, radius: int = 1):
+        # Chunks around a position, e.g. around the player
+        center_y, center_x = int(y) // self.chunk_size, int(x) // self.chunk_size
+        for chunk_y in range(center_y - radius, center_y + radius + 1):
+            for chunk_x in range(center_x - radius, center_x + radius + 1):
+                if 0 <= chunk_y * self.chunk_size < self.shape[0] and 0 <= chunk_x * self.chunk_size < self.shape[1]:
+                    self.chunk(chunk_y, chunk_x)
+
+    def __getitem__(self, key):
+        # Only map[y, x] with integers or integer arrays is supported
+        ys, xs = key
+        if np.isscalar(ys) and np.isscalar(xs):
+            if not (0 <= ys < self.shape[0] and 0 <= xs < self.shape[1]):
+                return self.dtype.type(self.outside)
+            return self.chunk(ys // self.chunk_size, xs // self.chunk_size)[ys % self.chunk_size, xs % self.chunk_size]
+
+        ys, xs = np.broadcast_arrays(np.asarray(ys), np.asarray(xs))
+        cells = np.full(ys.shape, self.outside, dtype=self.dtype)
+        inside = (ys >= 0) & (ys < self.shape[0]) & (xs >= 0) & (xs < self.shape[1])
+        ys, xs = ys[inside], xs[inside]
+        if len(ys) == 0:
+            return cells
+
+        # Group the requested cells by chunk and read every chunk once
+        chunks_x = -(-self.shape[1] // self.chunk_size)
+        chunk_ids = (ys // self.chunk_size) * chunks_x + xs // self.chunk_size
+        order = np.argsort(chunk_ids, kind="stable")
+        sorted_ids = chunk_ids[order]
+        starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        ends = np.r_[starts[1:], len(order)]
+
+        values = np.empty(len(ys), dtype=self.dtype)
+        for start, end in zip(starts, ends):
+            cells_in_chunk = order[start:end]
+            chunk = self.chunk(*divmod(int(sorted_ids[start]), chunks_x))
+            values[cells_in_chunk] = chunk[ys[cells_in_chunk] % self.chunk_size, xs[cells_in_chunk] % self.chunk_size]
+        cells[inside] = values
+        return cells
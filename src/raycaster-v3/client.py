@@ -0,0 +1,263 @@
+import math
+import numpy as np
+import pygame
+import time
+from assets import AssetBundle, load_map
+from distance_field import load_distance_field
+from incremental import IncrementalRenderer
+from lighting import Lighting
+from movement import move, rotate
+from parallel import ParallelRenderer
+from profiler import profiler
+from ray_cache import RayRingCache
+from recording import DOWN, LEFT, RIGHT, UP, InputRecorder, InputReplay
+from renderer import Renderer
+from resolution import AdaptiveResolution, ResolutionController
+from sprites import Sprites
+from textures import TextureAtlas, load_atlas
+from typing import List, Optional, Tuple
+
+pygame.init()
+
+
+class RaycasterClient:
+    # Settings of a variant, the game scripts override them
+    caption = "Raycaster"
+    line_width = 2
+
+    # Sky and floor images behind the walls instead of the renderer's plain background
+    backdrop = False
+
+    # Darkness is looked up from shaded copies of the textures, off without a brightness
+    brightness: Optional[float] = None
+    light_buckets = 32
+
+    def __init__(self, map_path: str, texture_path: str, window_size: Tuple[int, int] = (700, 650),
+                 workers: int = 1, bundle: Optional[AssetBundle] = None, sphere_tracing: bool = False,
+                 profile: bool = False, trace_path: Optional[str] = None, record_path: Optional[str] = None,
+                 replay_path: Optional[str] = None, scroll_pixels: bool = False, ray_cache: bool = False,
+                 adaptive_resolution: bool = False, textured_floor: bool = False,
+                 sprites: Optional[Sprites] = None):
+        # Load map, textures, and images, from the asset bundle if there is one
+        self.bundle = bundle
+        self.map = load_map(map_path, bundle)
+        self.textures = bundle.atlas(texture_path) if bundle else load_atlas(texture_path)
+
+        # Window setup
+        self.win_x, self.win_y = window_size
+        self.screen = pygame.display.set_mode((self.win_x, self.win_y))
+        pygame.display.set_caption(self.caption)
+        self.p_logo = self.load_image("images/logo.png")
+        pygame.display.set_icon(self.p_logo)
+
+        # Constants
+        self.pi = math.pi
+        self.max_fps = 30
+        self.move_speed = 0.2
+        self.rotation_speed = math.radians(3)
+        self.field_of_view = math.radians(50)
+        self.size = 800
+
+        # Player position and direction
+        self.player_x = 2.01
+        self.player_y = 47.01
+        self.direction = math.radians(45.01)
+
+        # A replay starts where its recording started and runs without a frame rate limit
+        self.replay = InputReplay(replay_path) if replay_path else None
+        if self.replay is not None:
+            self.player_x, self.player_y, self.direction = self.replay.player_x, self.replay.player_y, \
+                self.replay.direction
+            self.move_speed, self.rotation_speed = self.replay.move_speed, self.replay.rotation_speed
+            self.max_fps = 0
+        self.recorder = None
+        if record_path:
+            self.recorder = InputRecorder(record_path, map_path, self.player_x, self.player_y, self.direction,
+                                          self.move_speed, self.rotation_speed)
+
+        # Prerender floor and sky, the renderer draws the walls on top
+        background = None
+        if self.backdrop:
+            self.floor = self.load_image("images/floor.png", (self.win_x, int(self.win_y / 2)))
+            self.sky = self.load_image("images/sky.png", (self.win_x, int(self.win_y / 2)))
+            self.screen.fill((127, 127, 255))
+            self.screen.blit(self.sky, (0, 0))
+            self.screen.blit(self.floor, (0, self.win_y / 2))
+            background = pygame.surfarray.array3d(self.screen)
+
+        lighting = None
+        if self.brightness is not None:
+            lighting = Lighting(self.textures, self.brightness, self.light_buckets, falloff="inverse")
+
+        # Renderer, optionally split over worker processes
+        self.workers = workers
+        self.resolution: Optional[AdaptiveResolution] = None
+        self.small_frame: Optional[pygame.Surface] = None
+
+        # Optionally floor and ceiling are cast with the brick texture instead of showing the background
+        floor_textures = None
+        if textured_floor:
+            bricks = pygame.surfarray.array3d(self.load_image("images/bricks.jpg", (64, 64))).swapaxes(0, 1)
+            floor_textures = TextureAtlas.from_images(bricks[np.newaxis])
+
+        # Sphere tracing jumps rays by the distance field of the map, an alternative for big sparse maps
+        distance_field = load_distance_field(map_path, self.map) if sphere_tracing else None
+        if self.workers > 1:
+            self.renderer = ParallelRenderer(self.map, self.textures, window_size, self.line_width,
+                                             self.field_of_view, self.size, background, lighting,
+                                             workers=self.workers, distance_field=distance_field,
+                                             floor_textures=floor_textures)
+        else:
+            # Frames where the player only turns reuse the rays of the last frame, with the ray cache also places
+            # the player comes back to. Sprites are only drawn by the single process renderer
+            cache = RayRingCache() if ray_cache else None
+
+            def make_renderer(renderer_size: Tuple[int, int], size: float,
+                              level_background: Optional[np.ndarray]) -> Renderer:
+                return IncrementalRenderer(self.map, self.textures, renderer_size, self.line_width,
+                                           self.field_of_view, size, level_background, lighting,
+                                           distance_field=distance_field, scroll_pixels=scroll_pixels,
+                                           ray_cache=cache, floor_textures=floor_textures, sprites=sprites)
+
+            # Optionally frames are rendered smaller while they take longer than max_fps allows
+            if adaptive_resolution:
+                controller = ResolutionController(1 / (self.max_fps or 30))
+                self.resolution = AdaptiveResolution(make_renderer, window_size, self.size, background, controller)
+                self.renderer = self.resolution.renderer
+            else:
+                self.renderer = make_renderer(window_size, self.size, background)
+
+        # Setup the game clock
+        self.clock = pygame.time.Clock()
+
+        # Stage timings, shown with profile or F3 and written as a Chrome trace to trace_path when the game ends
+        self.show_profile = profile
+        self.screen_stale = True
+        self.trace_path = trace_path
+        self.font = pygame.font.Font(None, 22)
+        profiler.enabled = profile or trace_path is not None
+
+    def load_image(self, path: str, size: Optional[Tuple[int, int]] = None) -> pygame.Surface:
+        # Bundled images are mapped straight into a surface and are already scaled for the default window
+        if self.bundle is not None and path in self.bundle:
+            pixels = self.bundle.image(path)
+            image = pygame.image.frombuffer(pixels, (pixels.shape[1], pixels.shape[0]), "RGBA")
+        else:
+            image = pygame.image.load(path)
+        if size is not None and image.get_size() != size:
+            image = pygame.transform.scale(image.convert_alpha(), size)
+        return image
+
+    def run(self):
+        running = True
+        tick = 0
+        while running:
+            with profiler.span("frame"):
+                with profiler.span("clock.tick"):
+                    self.clock.tick(self.max_fps)
+                frame_start = time.perf_counter()
+
+                with profiler.span("input"):
+                    # Handle events, F3 shows the time of every stage of the last frame
+                    for event in pygame.event.get():
+                        if event.type == pygame.QUIT:
+                            running = False
+                        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                            self.show_profile = not self.show_profile
+                            self.screen_stale = True
+                            profiler.enabled = self.show_profile or self.trace_path is not None
+
+                    # Held keys of this tick, from the replay until it ends
+                    if self.replay is None:
+                        keys = self.pressed_keys()
+                    elif tick < len(self.replay.ticks):
+                        keys = int(self.replay.ticks[tick])
+                    else:
+                        break
+                    if self.recorder is not None:
+                        self.recorder.record(keys)
+                    tick += 1
+
+                    # Move forward
+                    if keys & UP:
+                        self.move_player(forward=True)
+
+                    # Move backward
+                    if keys & DOWN:
+                        self.move_player(forward=False)
+
+                    # Rotate right
+                    if keys & RIGHT:
+                        self.rotate_player(right=True)
+
+                    # Rotate left
+                    if keys & LEFT:
+                        self.rotate_player(right=False)
+
+                # Render floor, sky and walls
+                with profiler.span("render"):
+                    self.renderer.render(self.player_x, self.player_y, self.direction)
+
+                # Update the display where the frame changed
+                with profiler.span("blit"):
+                    dirty_rects = self.update_screen()
+                with profiler.span("display.update"):
+                    pygame.display.update(dirty_rects)
+
+                # The resolution follows the time the frame took without waiting for the clock
+                if self.resolution is not None and self.resolution.frame_done(time.perf_counter() - frame_start):
+                    self.renderer = self.resolution.renderer
+                    self.screen_stale = True
+            profiler.end_frame()
+
+        if self.recorder is not None:
+            self.recorder.save()
+        if self.trace_path is not None:
+            profiler.export_chrome_trace(self.trace_path)
+        if self.workers > 1:
+            self.renderer.close()
+        pygame.display.quit()
+
+    def update_screen(self) -> List[pygame.Rect]:
+        pixels = self.renderer.framebuffer.pixels
+        screen_rect = [self.screen.get_rect()]
+        scaled = self.resolution is not None and self.resolution.scale < 1
+        if self.workers > 1 or self.show_profile or self.screen_stale or scaled:
+            if scaled:
+                # A smaller frame is scaled up to the window in one operation
+                if self.small_frame is None or self.small_frame.get_size() != pixels.shape[:2]:
+                    self.small_frame = pygame.Surface(pixels.shape[:2], 0, self.screen)
+                pygame.surfarray.blit_array(self.small_frame, pixels)
+                pygame.transform.scale(self.small_frame, (self.win_x, self.win_y), self.screen)
+            else:
+                pygame.surfarray.blit_array(self.screen, pixels)
+            if self.show_profile:
+                self.draw_profile()
+            self.screen_stale = False
+            return screen_rect
+
+        # Scroll the screen like the framebuffer and copy only the columns that were drawn anew
+        if self.renderer.scroll:
+            self.screen.scroll(dx=-self.renderer.scroll)
+        for x, y, width, height in self.renderer.redrawn:
+            pygame.surfarray.blit_array(self.screen.subsurface((x, y, width, height)), pixels[x:x + width])
+        return screen_rect if self.renderer.scroll else [pygame.Rect(rect) for rect in self.renderer.redrawn]
+
+    def draw_profile(self):
+        # Stages of the last frame in the top left corner, slowest first
+        for i, line in enumerate(profiler.overlay_lines()):
+            text = self.font.render(line, True, (255, 255, 255), (0, 0, 0))
+            self.screen.blit(text, (5, 5 + i * 18))
+
+    def pressed_keys(self) -> int:
+        pressed = pygame.key.get_pressed()
+        return (UP * pressed[pygame.K_UP] | DOWN * pressed[pygame.K_DOWN] | RIGHT * pressed[pygame.K_RIGHT]
+                | LEFT * pressed[pygame.K_LEFT])
+
+    def move_player(self, forward: bool):
+        self.player_x, self.player_y = move(self.map, self.player_x, self.player_y, self.direction, self.move_speed,
+                                            forward)
+
+    def rotate_player(self, right: bool):
+        self.direction = rotate(self.direction, self.rotation_speed, right)
+
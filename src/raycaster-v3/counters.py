@@ -0,0 +1,75 @@
+import numpy as np
+from PIL import Image
+from typing import List, Tuple
+
+
+class TraversalCounters:
+    def __init__(self, map_shape: Tuple[int, int], max_steps: int = 100):
+        self.map_shape = tuple(map_shape)
+        self.casts = 0
+        self.rays = 0
+
+        # How often the DDA read every map cell
+        self.heatmap = np.zeros(self.map_shape, dtype=np.int64)
+
+        # Rays by the number of loop iterations they needed, the last bin also holds all longer rays
+        self.step_histogram = np.zeros(max_steps + 1, dtype=np.int64)
+
+        # Grid lines crossed, horizontal lines are crossed by steps in y
+        self.horizontal_crossings = 0
+        self.vertical_crossings = 0
+
+        # Rays per wall type that was hit
+        self.wall_hits = np.zeros(0, dtype=np.int64)
+
+        # Cells read during the current cast, counted when it is finished
+        self.visited: List[np.ndarray] = []
+
+    def visit(self, blocks: np.ndarray):
+        self.visited.append(blocks)
+
+    def cross(self, horizontal: int, vertical: int):
+        self.horizontal_crossings += int(horizontal)
+        self.vertical_crossings += int(vertical)
+
+    def finish_cast(self, steps: np.ndarray, wall_type: np.ndarray, row_stride: int, column_offset: int = 0):
+        self.casts += 1
+        self.rays += len(steps)
+        np.add.at(self.step_histogram, np.minimum(steps, len(self.step_histogram) - 1), 1)
+
+        hits = np.bincount(wall_type)
+        if len(hits) > len(self.wall_hits):
+            self.wall_hits = np.pad(self.wall_hits, (0, len(hits) - len(self.wall_hits)))
+        self.wall_hits[:len(hits)] += hits
+
+        # Flat block indices back to map cells, rays that left a streamed map read no cell
+        if self.visited:
+            cell_y, cell_x = np.divmod(np.concatenate(self.visited), row_stride)
+            cell_x -= column_offset
+            inside = (cell_y >= 0) & (cell_y < self.map_shape[0]) & (cell_x >= 0) & (cell_x < self.map_shape[1])
+            np.add.at(self.heatmap, (cell_y[inside], cell_x[inside]), 1)
+        self.visited = []
+
+    def summary(self) -> dict:
+        return {
+            "casts": self.casts,
+            "rays": self.rays,
+            "cells_per_ray": float(self.heatmap.sum() / max(self.rays, 1)),
+            "step_histogram": self.step_histogram.tolist(),
+            "horizontal_crossings": self.horizontal_crossings,
+            "vertical_crossings": self.vertical_crossings,
+            "wall_hits": {wall_type: int(hits) for wall_type, hits in enumerate(self.wall_hits) if hits},
+        }
+
+    def save_heatmap(self, path: str, scale: int = 8):
+        # Raw counts as .npy, anything else is an image with one scale x scale square per cell
+        if path.endswith(".npy"):
+            np.save(path, self.heatmap)
+            return
+
+        # Log scale from black over red and yellow to white
+        heat = np.log1p(self.heatmap)
+        heat = heat / heat.max() if heat.max() > 0 else heat
+        rgb = np.clip(np.stack([heat * 3, heat * 3 - 1, heat * 3 - 2], axis=-1), 0, 1)
+        pixels = np.repeat(np.repeat((rgb * 255).astype(np.uint8), scale, axis=0), scale, axis=1)
+        Image.fromarray(pixels).save(path)
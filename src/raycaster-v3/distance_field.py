@@ -0,0 +1,43 @@
+import hashlib
+import numpy as np
+import os
+
+
+def chebyshev_distances(world_map: np.ndarray) -> np.ndarray:
+    # Chebyshev distance of every cell to the nearest wall, 0 on walls, cells beyond the edge count as walls
+    occupied = np.asarray(world_map) != 0
+    distances = np.zeros(occupied.shape, dtype=np.int32)
+    reached = np.pad(occupied, 1, constant_values=True)
+
+    # Grow the walls by one ring of cells per pass, the 3x3 dilation is done rows first, then columns
+    distance = 0
+    while not reached.all():
+        distance += 1
+        grown = reached.copy()
+        grown[1:] |= reached[:-1]
+        grown[:-1] |= reached[1:]
+        rows = grown.copy()
+        grown[:, 1:] |= rows[:, :-1]
+        grown[:, :-1] |= rows[:, 1:]
+        distances[(grown & ~reached)[1:-1, 1:-1]] = distance
+        reached = grown
+    return distances
+
+
+def map_checksum(world_map: np.ndarray) -> str:
+    world_map = np.ascontiguousarray(world_map)
+    return hashlib.sha1(str((world_map.shape, world_map.dtype.str)).encode() + world_map.tobytes()).hexdigest()
+
+
+def load_distance_field(map_path: str, world_map: np.ndarray) -> np.ndarray:
+    # Cached next to the map file, e.g. maps/map1.distances.npz, and rebuilt when the map has changed
+    cache_path = os.path.splitext(map_path)[0] + ".distances.npz"
+    checksum = map_checksum(world_map)
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as cache:
+            if str(cache["checksum"]) == checksum:
+                return cache["distances"]
+
+    distances = chebyshev_distances(world_map)
+    np.savez(cache_path, distances=distances, checksum=checksum)
+    return distances
@@ -0,0 +1,157 @@
+import math
+import numpy as np
+from agents import Agents
+from camera import Camera
+from caster import cast_ray_vectors
+from concurrent.futures import ThreadPoolExecutor
+from framebuffer import Framebuffer
+from lighting import Lighting
+from observation import Observation, depth_image
+from occupancy import build_occupancy
+from renderer import make_background
+from textures import TextureAtlas
+from typing import List, Optional, Sequence, Tuple, Union
+
+
+def combine_maps(maps: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    # All maps side by side in one map, separated by a wall column, and the x offset of every map in it
+    height = max(world_map.shape[0] for world_map in maps)
+    offsets = np.cumsum([0] + [world_map.shape[1] + 1 for world_map in maps])
+    combined = np.ones((height, offsets[-1] - 1), dtype=np.result_type(*maps))
+    for world_map, offset in zip(maps, offsets):
+        combined[:world_map.shape[0], offset:offset + world_map.shape[1]] = world_map
+    return combined, offsets[:-1]
+
+
+# Observations: shaded images, depth images, or only the per-column geometry of the rays
+OBSERVATIONS = ("rgb", "depth", "geometry")
+
+
+class BatchEnvironment:
+    def __init__(self, maps: Union[np.ndarray, Sequence[np.ndarray]], textures: Optional[TextureAtlas],
+                 num_envs: int, observation_size: Tuple[int, int] = (64, 64), line_width: int = 1,
+                 field_of_view: float = math.radians(50), size: Optional[float] = None,
+                 lighting: Optional[Lighting] = None, move_speed: float = 0.2,
+                 rotation_speed: float = math.radians(3), workers: int = 1, seed: Optional[int] = None,
+                 observation: str = "rgb"):
+        if observation not in OBSERVATIONS:
+            raise ValueError(f"Unknown observation {observation!r}, expected one of {', '.join(OBSERVATIONS)}")
+        if observation == "rgb" and textures is None:
+            raise ValueError("rgb observations need textures")
+        self.observation = observation
+
+        # Environment i plays on map i % len(maps). All rays of all views are cast in one call through the
+        # combined map, positions are kept in its coordinates
+        self.maps: List[np.ndarray] = [maps] if isinstance(maps, np.ndarray) and maps.ndim == 2 else list(maps)
+        self.world_map, map_offsets = combine_maps(self.maps)
+        self.occupancy = build_occupancy(self.world_map)
+        self.num_envs = num_envs
+        self.map_index = np.arange(num_envs) % len(self.maps)
+        self.offset_x = map_offsets[self.map_index]
+        self.rng = np.random.default_rng(seed)
+
+        # Every view casts its rays like a Renderer of the observation size, walls keep the game's proportions
+        self.win_x, self.win_y = observation_size
+        self.size = 800 * self.win_y / 650 if size is None else size
+        self.rays_per_view = math.ceil(self.win_x / line_width)
+        self.camera = Camera(field_of_view, int(self.win_x / line_width) + 1, 0, self.rays_per_view)
+
+        self.agents = Agents(np.zeros(num_envs), np.zeros(num_envs), np.zeros(num_envs), move_speed, rotation_speed)
+
+        # Views are split into one batch per worker thread, NumPy releases the GIL in the heavy operations.
+        # For rgb observations each batch draws its views side by side into one framebuffer
+        self.batches = [(batch[0], batch[-1] + 1) for batch in np.array_split(np.arange(num_envs), workers)
+                        if len(batch)]
+        columns = np.arange(self.win_x)
+        self.column_rays = columns // line_width
+        self.framebuffers = []
+        self.backgrounds = []
+        for first, last in self.batches if observation == "rgb" else []:
+            views = last - first
+            framebuffer = Framebuffer(textures, (views * self.win_x, self.win_y), line_width, self.size,
+                                      lighting=lighting)
+            framebuffer.column_rays = (np.arange(views)[:, np.newaxis] * self.rays_per_view
+                                       + self.column_rays).ravel()
+            self.framebuffers.append(framebuffer)
+            self.backgrounds.append(np.tile(make_background(observation_size), (views, 1, 1)))
+        self.pool = ThreadPoolExecutor(len(self.batches)) if len(self.batches) > 1 else None
+
+        # Last observations, (env, row, column, rgb) like images or (env, row, column) depth images, and the
+        # geometry of every column
+        if observation == "rgb":
+            self.observations = np.zeros((num_envs, self.win_y, self.win_x, 3), dtype=np.uint8)
+        elif observation == "depth":
+            self.observations = np.zeros((num_envs, self.win_y, self.win_x), dtype=np.float32)
+        else:
+            self.observations = None
+        self.depth = np.zeros((num_envs, self.win_x))
+        self.side = np.zeros((num_envs, self.win_x), dtype=np.int8)
+        self.wall_ids = np.zeros((num_envs, self.win_x), dtype=np.intp)
+        self.wall_x = np.zeros((num_envs, self.win_x))
+
+    def poses(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Positions in the coordinates of every environment's own map
+        return self.agents.x - self.offset_x, self.agents.y.copy(), self.agents.direction.copy()
+
+    def reset(self, envs: Optional[np.ndarray] = None) -> Union[np.ndarray, Observation]:
+        # Place the environments, all by default, in a random free cell with a random direction
+        envs = np.arange(self.num_envs) if envs is None else np.asarray(envs)
+        for map_index, world_map in enumerate(self.maps):
+            on_map = envs[self.map_index[envs] == map_index]
+            free_y, free_x = np.nonzero(world_map == 0)
+            cells = self.rng.integers(len(free_x), size=len(on_map))
+            self.agents.x[on_map] = self.offset_x[on_map] + free_x[cells] + 0.5
+            self.agents.y[on_map] = free_y[cells] + 0.5
+        self.agents.direction[envs] = self.rng.uniform(0, 2 * math.pi, len(envs))
+        return self.render()
+
+    def step(self, keys: Union[int, np.ndarray]) -> Union[np.ndarray, Observation]:
+        # keys holds the UP, DOWN, RIGHT and LEFT bits of every environment
+        self.agents.step(self.world_map, keys)
+        return self.render()
+
+    def render(self) -> Union[np.ndarray, Observation]:
+        if self.pool is None:
+            self.render_batch(0)
+        else:
+            list(self.pool.map(self.render_batch, range(len(self.batches))))
+        if self.observation == "geometry":
+            return Observation(self.depth, self.side, self.wall_ids, self.wall_x)
+        return self.observations
+
+    def render_batch(self, batch: int):
+        first, last = self.batches[batch]
+        views = last - first
+
+        # Rays of all views at once, view by view, with the rotation of Camera.ray_vectors
+        camera = self.camera
+        cos_direction = np.cos(self.agents.direction[first:last])[:, np.newaxis]
+        sin_direction = np.sin(self.agents.direction[first:last])[:, np.newaxis]
+        dir_x = (cos_direction * camera.fisheye - sin_direction * camera.sin_offsets).ravel()
+        dir_y = (-(sin_direction * camera.fisheye + cos_direction * camera.sin_offsets)).ravel()
+        start_x = np.repeat(self.agents.x[first:last], self.rays_per_view)
+        start_y = np.repeat(self.agents.y[first:last], self.rays_per_view)
+        hits = cast_ray_vectors(self.world_map, start_x, start_y, dir_x, dir_y, self.occupancy)
+
+        distances = hits.ray_length * np.tile(camera.fisheye, views)
+        wall_x = np.where(hits.side, hits.hit_y, hits.hit_x) % 1
+
+        # Rays to (view, column), every view has rays_per_view rays
+        self.depth[first:last] = distances.reshape(views, self.rays_per_view)[:, self.column_rays]
+        self.side[first:last] = hits.side.reshape(views, self.rays_per_view)[:, self.column_rays]
+        self.wall_ids[first:last] = hits.wall_type.reshape(views, self.rays_per_view)[:, self.column_rays]
+        self.wall_x[first:last] = wall_x.reshape(views, self.rays_per_view)[:, self.column_rays]
+
+        if self.observation == "depth":
+            self.observations[first:last] = depth_image(self.depth[first:last], self.win_y, self.size)
+        elif self.observation == "rgb":
+            # Framebuffer columns back to (view, row, column) images
+            framebuffer = self.framebuffers[batch]
+            framebuffer.clear(self.backgrounds[batch])
+            framebuffer.draw_walls(distances, hits.side, hits.wall_type, wall_x)
+            self.observations[first:last] = framebuffer.pixels.reshape(views, self.win_x, self.win_y, 3
+                                                                       ).swapaxes(1, 2)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
@@ -0,0 +1,63 @@
+import numpy as np
+from camera import Camera
+from lighting import Lighting
+from observation import row_distances
+from textures import TextureAtlas
+from typing import Optional
+
+
+class FloorCaster:
+    def __init__(self, textures: TextureAtlas, win_y: int, size: float, texel_offset: int = 0,
+                 lighting: Optional[Lighting] = None):
+        # Texture 1 of the atlas covers the floor and texture 2 the ceiling, one texture covers both
+        self.textures = textures
+
+        # With lighting the floor is shaded like walls on side 0, its texels follow the wall texels in the gather
+        self.lighting = None if lighting is None else \
+            Lighting(textures, lighting.brightness, lighting.buckets, lighting.falloff)
+        self.texels = textures.texels if self.lighting is None else self.lighting.texels
+        self.texel_offset = texel_offset
+
+        # A floor row shows the floor where a wall of that distance would end, the ceiling row mirrored at the
+        # horizon shows the same map point
+        self.win_y = win_y
+        self.horizon = win_y // 2
+        self.row_distances = row_distances(win_y, size)[self.horizon:].astype(np.float32)
+        self.mirrored = win_y - 1 - np.arange(self.horizon) - self.horizon
+
+        # Mip level of every row like for walls of the same distance
+        level = np.log2(textures.texture_shape * self.row_distances / size).astype(np.int32)
+        np.clip(level, 0, len(textures.sizes) - 1, out=level)
+        self.level_size = textures.sizes[level]
+        self.row_offset = (texel_offset + textures.offsets[level]).astype(np.int32)
+        if self.lighting is not None:
+            side = np.zeros(len(self.row_distances), dtype=np.int32)
+            self.row_offset += self.lighting.variants(self.row_distances, side) * self.lighting.variant_size
+        self.ceiling_offset = self.level_size ** 2 * min(textures.num_textures - 1, 1)
+
+    def texel_index(self, player_x: float, player_y: float, direction: float, camera: Camera,
+                    column_rays: np.ndarray) -> np.ndarray:
+        # Gather index of every pixel of the screen columns that is not covered by a wall
+        first_ray = int(column_rays[0])
+        rays = slice(first_ray, int(column_rays[-1]) + 1)
+
+        # Rays reach the floor point of a row at the row distance divided by the cos of their offset
+        dir_x, dir_y = camera.ray_vectors(direction)
+        step_x = (dir_x[rays] / camera.fisheye[rays]).astype(np.float32)
+        step_y = (dir_y[rays] / camera.fisheye[rays]).astype(np.float32)
+        floor_x = np.float32(player_x) + step_x[:, np.newaxis] * self.row_distances
+        floor_y = np.float32(player_y) + step_y[:, np.newaxis] * self.row_distances
+
+        # Texel of every (ray, floor row) within the mip level of its row
+        texture_x = ((floor_x - np.floor(floor_x)) * self.level_size).astype(np.int32)
+        texture_y = ((floor_y - np.floor(floor_y)) * self.level_size).astype(np.int32)
+        np.minimum(texture_x, self.level_size - 1, out=texture_x)
+        np.minimum(texture_y, self.level_size - 1, out=texture_y)
+        floor_index = self.row_offset + texture_y * self.level_size + texture_x
+
+        # Screen columns of the rays, the ceiling rows in the upper half
+        floor_index = floor_index[column_rays - first_ray]
+        index = np.empty((len(column_rays), self.win_y), dtype=np.int32)
+        index[:, self.horizon:] = floor_index
+        index[:, :self.horizon] = floor_index[:, self.mirrored] + self.ceiling_offset[self.mirrored]
+        return index
@@ -0,0 +1,94 @@
+import numpy as np
+from lighting import Lighting
+from profiler import profiler
+from textures import TextureAtlas
+from typing import Optional, Tuple
+
+
+class Framebuffer:
+    def __init__(self, textures: TextureAtlas, window_size: Tuple[int, int], line_width: int, size: float,
+                 first_column: int = 0, pixels: Optional[np.ndarray] = None, lighting: Optional[Lighting] = None,
+                 floor_texels: Optional[np.ndarray] = None):
+        # All mip levels of all wall textures, one texel per row for the gather
+        self.textures = textures
+        self.texture_shape = textures.texture_shape
+
+        # With lighting the walls are gathered from the shaded copies of the atlas
+        self.lighting = lighting
+        self.texels = textures.texels if lighting is None else lighting.texels
+
+        # Pixels are stored as (x, y, rgb) like pygame.surfarray expects, window_size may be a strip of columns
+        self.win_x, self.win_y = window_size
+        self.pixels = np.zeros((self.win_x, self.win_y, 3), dtype=np.uint8) if pixels is None else pixels
+        self.size = size
+
+        # Every screen column shows the ray it lies in, counted from the first ray of the strip
+        screen_columns = np.arange(first_column, first_column + self.win_x)
+        self.column_rays = screen_columns // line_width - first_column // line_width
+        self.rows = np.arange(self.win_y, dtype=np.float32)
+
+        # Pixels that are not part of a wall are gathered from a copy of the previous pixel values behind the texels,
+        # or from the floor texels between them
+        floor_texels = np.zeros((0, 3), dtype=np.uint8) if floor_texels is None else floor_texels
+        self.pixel_offset = len(self.texels) + len(floor_texels)
+        self.source = np.empty((self.pixel_offset + self.win_x * self.win_y, 3), dtype=np.uint8)
+        self.source[:len(self.texels)] = self.texels
+        self.source[len(self.texels):self.pixel_offset] = floor_texels
+        self.pixel_index = (self.pixel_offset + np.arange(self.win_x * self.win_y, dtype=np.int32)
+                            ).reshape(self.win_x, self.win_y)
+
+    def clear(self, background: np.ndarray, first_column: int = 0, last_column: Optional[int] = None):
+        self.pixels[first_column:last_column] = background[first_column:last_column]
+
+    def draw_walls(self, distances: np.ndarray, side: np.ndarray, wall_type: np.ndarray, wall_x: np.ndarray,
+                   first_column: int = 0, last_column: Optional[int] = None,
+                   background_index: Optional[np.ndarray] = None):
+        # Only the screen columns [first, last) are drawn. Pixels off the walls keep their value or are gathered from
+        # background_index
+        column_rays = self.column_rays[first_column:last_column]
+        pixels = self.pixels[first_column:last_column]
+
+        with profiler.span("texture columns"):
+            # Per screen column values of the ray it shows
+            distances = distances[column_rays]
+            column_height = self.size / distances
+            draw_start = (self.win_y / 2) - (column_height / 2)
+            side = side[column_rays]
+
+            # Mip level with about one texel per pixel, far walls read the small levels
+            level = np.log2(self.texture_shape / column_height).astype(np.int32)
+            np.clip(level, 0, len(self.textures.sizes) - 1, out=level)
+            level_size = self.textures.sizes[level]
+
+            # Position of every pixel on the wall, outside of [0, 1) the pixel is not part of the wall
+            wall_y = (self.rows[np.newaxis, :] - draw_start[:, np.newaxis].astype(np.float32)) \
+                / column_height[:, np.newaxis].astype(np.float32)
+            on_wall = (wall_y >= 0) & (wall_y < 1)
+            texture_y = (wall_y * level_size[:, np.newaxis].astype(np.float32)).astype(np.int32)
+            np.clip(texture_y, 0, level_size[:, np.newaxis] - 1, out=texture_y)
+
+            # Index of every wall pixel in the atlas
+            texture_x = np.minimum((wall_x[column_rays] * level_size).astype(np.int32), level_size - 1)
+            column_offset = self.textures.offsets[level] \
+                + (wall_type[column_rays] - 1) * level_size * level_size + texture_x
+
+            # Distance and side select a shaded copy of the atlas, shading is part of the lookup
+            if self.lighting is not None:
+                column_offset += self.lighting.variants(distances, side) * self.lighting.variant_size
+            texel_index = column_offset[:, np.newaxis] + texture_y * level_size[:, np.newaxis]
+
+        with profiler.span("texels"):
+            # Gather walls and background of the whole frame in one pass
+            if background_index is None:
+                start = self.pixel_offset + first_column * self.win_y
+                self.source[start:start + pixels.size // 3] = pixels.reshape(-1, 3)
+                background_index = self.pixel_index[first_column:last_column]
+            np.take(self.source, np.where(on_wall, texel_index, background_index), axis=0, out=pixels)
+
+        with profiler.span("shading"):
+            # Without lighting side 1 walls are shaded by halving their texels, only the wall pixels are shifted
+            if self.lighting is None:
+                shaded = side == 1
+                columns = pixels[shaded]
+                np.right_shift(columns, on_wall[shaded].view(np.uint8)[:, :, np.newaxis], out=columns)
+                pixels[shaded] = columns
@@ -0,0 +1,90 @@
+import math
+import numpy as np
+from renderer import Renderer
+from typing import List, Optional, Tuple
+
+
+class IncrementalRenderer(Renderer):
+    def __init__(self, *args, scroll_pixels: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_pose: Optional[Tuple[float, float, float]] = None
+
+        # Scrolled walls keep the height of the screen position they were drawn at, while the fisheye correction
+        # changes it with the position. So scrolling is an approximation that is redrawn when the turn stops.
+        # It also needs a background that looks the same in every column, a cast floor and sprites do not
+        self.scroll_pixels = scroll_pixels and self.floor is None and self.sprites is None \
+            and bool((self.background == self.background[:1]).all())
+        self.scrolled = False
+
+        # Screen columns the image moved to the left in the last frame and the (x, y, w, h) rects drawn anew
+        self.scroll = 0
+        self.redrawn: List[Tuple[int, int, int, int]] = []
+
+    def map_changed(self):
+        # The rays of the last frame may show walls that are gone
+        super().map_changed()
+        self.last_pose = None
+
+    def rotation_shift(self, player_x: float, player_y: float, direction: float) -> Optional[int]:
+        # Rays the fan moved by if the player only turned by whole rays, None if the frame has to be cast again
+        if self.last_pose is None or (player_x, player_y) != self.last_pose[:2]:
+            return None
+        turn = (direction - self.last_pose[2] + math.pi) % (2 * math.pi) - math.pi
+        shift = turn / self.camera.ray_density
+        if abs(shift - round(shift)) > 1e-6 or abs(round(shift)) >= len(self.distances):
+            return None
+        return round(shift)
+
+    def render(self, player_x: float, player_y: float, direction: float) -> np.ndarray:
+        shift = self.rotation_shift(player_x, player_y, direction)
+        self.last_pose = (player_x, player_y, direction)
+        width = self.framebuffer.win_x
+        if shift is None:
+            self.scroll = 0
+            self.redrawn = [(0, 0, width, self.win_y)]
+            self.scrolled = False
+            return super().render(player_x, player_y, direction)
+
+        # After turning by whole rays ray i shows what ray i + shift showed, only the rays at the edge are new
+        self.scroll = 0
+        self.redrawn = []
+
+        # Sprites can move while the player stands still
+        if not shift and (self.scrolled or self.sprites is not None):
+            self.draw()
+            self.redrawn = [(0, 0, width, self.win_y)]
+            self.scrolled = False
+        elif shift:
+            num_rays = len(self.distances)
+            kept, moved = (slice(0, num_rays - shift), slice(shift, None)) if shift > 0 else \
+                (slice(-shift, None), slice(0, num_rays + shift))
+            for rays in (self.ray_length, self.side, self.wall_type, self.wall_x, self.ray_steps):
+                rays[kept] = rays[moved]
+            self.cast(player_x, player_y, direction, slice(num_rays - shift, None) if shift > 0 else slice(0, -shift))
+
+            # The fisheye correction belongs to the screen position, not to the ray
+            np.multiply(self.ray_length, self.camera.fisheye, out=self.distances)
+
+            if self.scroll_pixels:
+                # Scroll the framebuffer with the rays and draw the uncovered columns
+                self.scroll = shift * self.line_width
+                pixels = self.framebuffer.pixels
+                if self.scroll > 0:
+                    pixels[:-self.scroll] = pixels[self.scroll:]
+                else:
+                    pixels[-self.scroll:] = pixels[:self.scroll]
+                first_column = max(width - self.scroll, 0) if self.scroll > 0 else 0
+                last_column = width if self.scroll > 0 else min(-self.scroll, width)
+                self.draw(first_column, last_column)
+                self.redrawn = [(first_column, 0, last_column - first_column, self.win_y)]
+                self.scrolled = True
+
+                # Depth of the scrolled columns changes with their fisheye correction
+                columns = self.framebuffer.column_rays
+                self.depth[:] = self.distances[columns]
+                self.wall_ids[:] = self.wall_type[columns]
+            else:
+                self.draw()
+                self.redrawn = [(0, 0, width, self.win_y)]
+
+        return self.framebuffer.pixels.swapaxes(0, 1)
@@ -0,0 +1,33 @@
+import numpy as np
+from textures import TextureAtlas
+from typing import Callable, Dict, Union
+
+# Light factor in [0, 1] for a distance and the brightness of the scene
+FALLOFFS: Dict[str, Callable[[np.ndarray, float], np.ndarray]] = {
+    "inverse": lambda distance, brightness: np.minimum(brightness / distance, 1),
+    "linear": lambda distance, brightness: np.clip(1 - distance / (4 * brightness), 0, 1),
+    "exponential": lambda distance, brightness: np.minimum(np.exp(1 - distance / brightness), 1),
+}
+
+
+class Lighting:
+    def __init__(self, textures: TextureAtlas, brightness: float, buckets: int = 16,
+                 falloff: Union[str, Callable[[np.ndarray, float], np.ndarray]] = "inverse"):
+        self.brightness = brightness
+        self.buckets = buckets
+        self.falloff = FALLOFFS[falloff] if isinstance(falloff, str) else falloff
+
+        # Light factor of every bucket, bucket 0 is black and the last one fully lit
+        self.levels = np.linspace(0, 1, buckets)
+
+        # Shaded copy of the atlas per bucket and side, side 1 walls get half the light
+        variants = [(textures.texels * (level / (1 + side))).astype(np.uint8)
+                    for level in self.levels for side in (0, 1)]
+        self.texels = np.concatenate(variants)
+        self.variant_size = len(textures.texels)
+
+    def variants(self, distances: np.ndarray, side: np.ndarray) -> np.ndarray:
+        # Index of the shaded atlas copy for every ray
+        light = self.falloff(distances, self.brightness)
+        bucket = np.rint(light * (self.buckets - 1)).astype(np.int32)
+        return bucket * 2 + side
@@ -0,0 +1,26 @@
+import math
+import numpy as np
+from typing import Tuple
+
+
+def move(world_map: np.ndarray, x: float, y: float, direction: float, speed: float,
+         forward: bool = True) -> Tuple[float, float]:
+    # x and y are checked one after the other, so the player slides along walls
+    sin_dir = math.sin(direction)
+    cos_dir = math.cos(direction)
+    if forward:
+        if not world_map[int(y), int(x + 0.6 * cos_dir)]:
+            x += speed * cos_dir
+        if not world_map[int(y - 0.6 * sin_dir), int(x)]:
+            y -= speed * sin_dir
+    else:
+        if not world_map[int(y), int(x - speed * cos_dir)]:
+            x -= speed * cos_dir
+        if not world_map[int(y + speed * sin_dir), int(x)]:
+            y += speed * sin_dir
+    return x, y
+
+
+def rotate(direction: float, speed: float, right: bool) -> float:
+    direction = direction + speed if right else direction - speed
+    return direction % (2 * math.pi)
@@ -0,0 +1,22 @@
+import numpy as np
+from typing import NamedTuple
+
+
+class Observation(NamedTuple):
+    distance: np.ndarray   # Fisheye corrected distance to the wall of every column
+    side: np.ndarray       # 0 = horizontal grid line hit, 1 = vertical grid line hit
+    wall_type: np.ndarray  # Map value of the wall
+    wall_x: np.ndarray     # Position of the hit along the wall in [0, 1)
+
+
+def row_distances(height: int, size: float) -> np.ndarray:
+    # Distance of the floor or ceiling point every screen row shows, where a wall of that distance would end
+    rows = np.arange(height)
+    return size / (2 * np.maximum(np.abs(rows + 0.5 - height / 2), 0.5))
+
+
+def depth_image(distance: np.ndarray, height: int, size: float) -> np.ndarray:
+    # (..., row, column) depth from the column distances (..., column): walls where they cover a row, floor and
+    # ceiling elsewhere. A wall covers exactly the rows whose floor point lies behind it
+    rows = row_distances(height, size).astype(np.float32)[:, np.newaxis]
+    return np.minimum(rows, distance[..., np.newaxis, :].astype(np.float32))
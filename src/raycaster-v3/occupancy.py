@@ -0,0 +1,42 @@
+import numpy as np
+from typing import List, Optional
+
+# Leaps only pay for their extra work where free cells lie in empty blocks of about 8 x 8 cells on average
+MIN_MEAN_SKIP_LEVEL = 3
+
+
+class OccupancyPyramid:
+    def __init__(self, world_map: np.ndarray):
+        # Level k says whether a block of 2^k x 2^k cells contains any wall
+        occupied = np.asarray(world_map) != 0
+        self.shape = occupied.shape
+        self.levels: List[np.ndarray] = [occupied]
+        level = occupied
+        while max(level.shape) > 1:
+            # Cells beyond the edge of the map count as walls, so rays never leap out of the map
+            height, width = level.shape
+            padded = np.ones((height + height % 2, width + width % 2), dtype=bool)
+            padded[:height, :width] = level
+            level = padded.reshape(len(padded) // 2, 2, -1, 2).any(axis=(1, 3))
+            self.levels.append(level)
+
+        # Highest level whose block around the cell is empty, 0 for cells next to walls
+        self.skip_levels = np.zeros(self.shape, dtype=np.intp)
+        for k, level in enumerate(self.levels[1:], 1):
+            block = 1 << k
+            empty = ~np.repeat(np.repeat(level, block, axis=0), block, axis=1)[:self.shape[0], :self.shape[1]]
+            self.skip_levels[empty] = k
+        self.skip_flat = self.skip_levels.ravel()
+
+    def pays_off(self) -> bool:
+        # Cramped maps like the shipped ones cast faster block by block
+        free = ~self.levels[0]
+        return bool(free.any()) and self.skip_levels[free].mean() >= MIN_MEAN_SKIP_LEVEL
+
+
+def build_occupancy(world_map: np.ndarray, enabled: Optional[bool] = None) -> Optional[OccupancyPyramid]:
+    # The pyramid of the map if enabled, by default only if it speeds up the rays
+    if enabled is False:
+        return None
+    occupancy = OccupancyPyramid(world_map)
+    return occupancy if enabled or occupancy.pays_off() else None
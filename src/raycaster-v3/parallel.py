@@ -0,0 +1,106 @@
+import math
+import multiprocessing
+import numpy as np
+import os
+from multiprocessing import shared_memory
+from framebuffer import Framebuffer
+from lighting import Lighting
+from renderer import Renderer, make_background
+from textures import TextureAtlas
+from typing import Dict, List, Optional, Tuple
+
+# State of a worker process, set up once by _init_worker
+_memory: Optional[shared_memory.SharedMemory] = None
+_settings: dict = {}
+_strip_renderers: Dict[int, Renderer] = {}
+
+
+def split_columns(win_x: int, line_width: int, strips: int) -> List[Tuple[int, int]]:
+    # Strip borders lie on ray borders, so no ray is cast by two workers
+    num_rays = math.ceil(win_x / line_width)
+    borders = [min(round(num_rays * i / strips) * line_width, win_x) for i in range(strips + 1)]
+    return [(start, end) for start, end in zip(borders, borders[1:]) if start < end]
+
+
+def _shared_arrays(memory: shared_memory.SharedMemory, win_x: int, win_y: int
+                   ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Layout of the shared block: pixels, depth and wall ids of every screen column
+    pixels = np.ndarray((win_x, win_y, 3), dtype=np.uint8, buffer=memory.buf)
+    offset = pixels.nbytes + (-pixels.nbytes) % 8
+    depth = np.ndarray(win_x, dtype=np.float64, buffer=memory.buf, offset=offset)
+    wall_ids = np.ndarray(win_x, dtype=np.intp, buffer=memory.buf, offset=offset + depth.nbytes)
+    return pixels, depth, wall_ids
+
+
+def _init_worker(memory_name: str, settings: dict):
+    global _memory, _settings
+    _memory = shared_memory.SharedMemory(name=memory_name)
+    _settings = settings
+
+
+def _render_strip(strip: int, player_x: float, player_y: float, direction: float):
+    win_x, win_y = _settings["window_size"]
+    pixels, depth, wall_ids = _shared_arrays(_memory, win_x, win_y)
+    first_column, last_column = _settings["strips"][strip]
+
+    # Every worker builds the renderer of a strip the first time it gets that strip
+    if strip not in _strip_renderers:
+        _strip_renderers[strip] = Renderer(
+            _settings["world_map"], _settings["textures"], _settings["window_size"], _settings["line_width"],
+            _settings["field_of_view"], _settings["size"], _settings["background"], _settings["lighting"],
+            columns=(first_column, last_column), pixels=pixels[first_column:last_column],
+            distance_field=_settings["distance_field"], floor_textures=_settings["floor_textures"])
+    renderer = _strip_renderers[strip]
+
+    renderer.render(player_x, player_y, direction)
+    depth[first_column:last_column] = renderer.depth
+    wall_ids[first_column:last_column] = renderer.wall_ids
+
+
+class ParallelRenderer:
+    def __init__(self, world_map: np.ndarray, textures: TextureAtlas, window_size: Tuple[int, int] = (700, 650),
+                 line_width: int = 2, field_of_view: float = math.radians(50), size: float = 800,
+                 background: Optional[np.ndarray] = None, lighting: Optional[Lighting] = None,
+                 workers: Optional[int] = None, strips: Optional[int] = None,
+                 distance_field: Optional[np.ndarray] = None, floor_textures: Optional[TextureAtlas] = None):
+        self.win_x, self.win_y = window_size
+        self.workers = workers or os.cpu_count() or 1
+        self.strips = split_columns(self.win_x, line_width, strips or self.workers)
+
+        # Framebuffer in shared memory, the workers write their strips directly into it
+        size_in_bytes = self.win_x * self.win_y * 3 + 8 + self.win_x * 16
+        self.memory = shared_memory.SharedMemory(create=True, size=size_in_bytes)
+        pixels, self.depth, self.wall_ids = _shared_arrays(self.memory, self.win_x, self.win_y)
+
+        self.framebuffer = Framebuffer(textures, window_size, line_width, size, pixels=pixels)
+
+        # Map, textures and background are sent to every worker only once
+        settings = {
+            "world_map": world_map,
+            "textures": textures,
+            "window_size": window_size,
+            "line_width": line_width,
+            "field_of_view": field_of_view,
+            "size": size,
+            "background": make_background(window_size) if background is None else background,
+            "lighting": lighting,
+            "distance_field": distance_field,
+            "floor_textures": floor_textures,
+            "strips": self.strips,
+        }
+        self.pool = multiprocessing.Pool(self.workers, initializer=_init_worker,
+                                         initargs=(self.memory.name, settings))
+
+    def render(self, player_x: float, player_y: float, direction: float) -> np.ndarray:
+        self.pool.starmap(_render_strip, [(strip, player_x, player_y, direction)
+                                          for strip in range(len(self.strips))])
+        return self.framebuffer.pixels.swapaxes(0, 1)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+        # The shared block can only be closed when no array uses it anymore
+        del self.framebuffer, self.depth, self.wall_ids
+        self.memory.close()
+        self.memory.unlink()
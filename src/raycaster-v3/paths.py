@@ -0,0 +1,135 @@
+import math
+import numpy as np
+from collections import deque
+from distance_field import chebyshev_distances
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Camera pose per frame: x, y and view direction
+Pose = Tuple[float, float, float]
+
+# Cell steps right, down, left, up; map rows grow downwards
+HEADINGS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+
+
+def _angle(heading: Tuple[int, int]) -> float:
+    return math.atan2(-heading[1], heading[0])
+
+
+def spawn_cell(world_map: np.ndarray) -> Tuple[int, int]:
+    # The most open free cell, the same for every run on a map
+    distances = chebyshev_distances(world_map)
+    y, x = np.unravel_index(np.argmax(distances), distances.shape)
+    return int(x), int(y)
+
+
+def spin_path(world_map: np.ndarray, frames: int) -> List[Pose]:
+    # One full turn on the spot
+    x, y = spawn_cell(world_map)
+    return [(x + 0.5, y + 0.5, 2 * math.pi * i / frames) for i in range(frames)]
+
+
+def walk_path(world_map: np.ndarray, frames: int) -> List[Pose]:
+    # Shortest path from the spawn to the farthest reachable cell, sampled evenly
+    start = spawn_cell(world_map)
+    previous = {start: start}
+    queue = deque([start])
+    while queue:
+        cell = queue.popleft()
+        for step_x, step_y in HEADINGS:
+            neighbour = (cell[0] + step_x, cell[1] + step_y)
+            if neighbour not in previous and world_map[neighbour[1], neighbour[0]] == 0:
+                previous[neighbour] = cell
+                queue.append(neighbour)
+
+    cells = [cell]
+    while cells[-1] != start:
+        cells.append(previous[cells[-1]])
+    cells.reverse()
+    if len(cells) == 1:
+        return spin_path(world_map, frames)
+
+    # Walk along the cell centres and look where the path goes
+    poses = []
+    for i in range(frames):
+        position = i * (len(cells) - 1) / frames
+        segment = int(position)
+        (x0, y0), (x1, y1) = cells[segment], cells[segment + 1]
+        t = position - segment
+        poses.append((x0 + 0.5 + (x1 - x0) * t, y0 + 0.5 + (y1 - y0) * t, _angle((x1 - x0, y1 - y0))))
+    return poses
+
+
+def longest_wall_run(world_map: np.ndarray) -> Optional[Tuple[int, int, int]]:
+    # Cell and heading where the longest straight stretch of free cells with a wall on the left begins
+    free = world_map == 0
+    best_length, best = 0, None
+    for heading, (step_x, step_y) in enumerate(HEADINGS):
+        # Border cells are walls, so no stretch wraps around the rolled edges
+        left_x, left_y = step_y, -step_x
+        along = free & np.roll(~free, (-left_y, -left_x), axis=(0, 1))
+        length = np.zeros(world_map.shape, dtype=np.intp)
+        ahead = along.copy()
+        steps = 0
+        while ahead.any():
+            length += ahead
+            steps += 1
+            ahead &= np.roll(along, (-step_y * steps, -step_x * steps), axis=(0, 1))
+        if length.max() > best_length:
+            y, x = np.unravel_index(np.argmax(length), length.shape)
+            best_length, best = length.max(), (int(x), int(y), heading)
+    return best
+
+
+def wall_hug_path(world_map: np.ndarray, frames: int, frames_per_step: int = 4) -> List[Pose]:
+    # Follow the wall on the left hand side close to it and look ahead, so the rays run down the corridor and
+    # graze the wall
+    def free(cell_x: int, cell_y: int) -> bool:
+        return world_map[cell_y, cell_x] == 0
+
+    # Start at the longest straight wall, without one walk right from the spawn to the first wall and follow it
+    start = longest_wall_run(world_map)
+    if start is not None:
+        x, y, heading = start
+    else:
+        x, y = spawn_cell(world_map)
+        while free(x + 1, y):
+            x += 1
+        heading = 1
+
+    poses: List[Pose] = []
+
+    def pose(cell_x: float, cell_y: float, heading_index: int, turn: float = 0) -> Pose:
+        step_x, step_y = HEADINGS[heading_index]
+        left_x, left_y = step_y, -step_x
+        direction = _angle((step_x, step_y)) + turn
+        return cell_x + 0.5 + 0.3 * left_x, cell_y + 0.5 + 0.3 * left_y, direction
+
+    while len(poses) < frames:
+        left = (heading - 1) % 4
+        if free(x + HEADINGS[left][0], y + HEADINGS[left][1]):
+            turn, heading = math.pi / 2, left
+        elif free(x + HEADINGS[heading][0], y + HEADINGS[heading][1]):
+            turn = 0
+        else:
+            # Turn right on the spot
+            for i in range(frames_per_step):
+                poses.append(pose(x, y, heading, -math.pi / 2 * i / frames_per_step))
+            heading = (heading + 1) % 4
+            continue
+
+        # Turn left if needed, then move one cell ahead
+        for i in range(frames_per_step if turn else 0):
+            poses.append(pose(x, y, (heading + 1) % 4, turn * i / frames_per_step))
+        step_x, step_y = HEADINGS[heading]
+        for i in range(frames_per_step):
+            t = i / frames_per_step
+            poses.append(pose(x + step_x * t, y + step_y * t, heading))
+        x, y = x + step_x, y + step_y
+    return poses[:frames]
+
+
+PATHS: Dict[str, Callable[[np.ndarray, int], List[Pose]]] = {
+    "walk": walk_path,
+    "spin": spin_path,
+    "wall-hug": wall_hug_path,
+}
@@ -0,0 +1,67 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Deque, Dict, List, Tuple
+
+# Shared by all disabled spans, entering it costs about as much as a function call
+_NO_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info):
+        self.profiler.add(self.name, self.start, time.perf_counter_ns() - self.start)
+
+
+class Profiler:
+    def __init__(self, enabled: bool = False, max_events: int = 1_000_000):
+        self.enabled = enabled
+
+        # Spans as (name, start, duration, thread) in nanoseconds, the oldest are dropped first
+        self.events: Deque[Tuple[str, int, int, int]] = deque(maxlen=max_events)
+
+        # Total time per span name of the current and the last finished frame
+        self.current: Dict[str, int] = {}
+        self.last_frame: Dict[str, int] = {}
+        self.frames = 0
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name)
+
+    def add(self, name: str, start: int, duration: int):
+        self.events.append((name, start, duration, threading.get_ident()))
+        self.current[name] = self.current.get(name, 0) + duration
+
+    def end_frame(self):
+        self.last_frame, self.current = self.current, {}
+        self.frames += 1
+
+    def overlay_lines(self) -> List[str]:
+        # Last frame in milliseconds, slowest span first
+        spans = sorted(self.last_frame.items(), key=lambda item: -item[1])
+        return [f"{name}: {duration / 1e6:.2f} ms" for name, duration in spans]
+
+    def export_chrome_trace(self, path: str):
+        # Complete events of the trace event format, timestamps in microseconds
+        pid = os.getpid()
+        events = [{"name": name, "ph": "X", "ts": start / 1000, "dur": duration / 1000, "pid": pid, "tid": thread}
+                  for name, start, duration, thread in self.events]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+# Instrumented modules use this one, it is switched on by the game or the benchmark
+profiler = Profiler()
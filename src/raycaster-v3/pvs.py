@@ -0,0 +1,181 @@
+import json
+import multiprocessing
+import numpy as np
+import os
+from caster import cast_ray_vectors
+from counters import TraversalCounters
+from distance_field import map_checksum
+from typing import List, NamedTuple, Optional, Tuple
+
+INDEX_FILE = "index.json"
+
+
+class VisibleCells(NamedTuple):
+    mask: np.ndarray  # (y1 - y0, x1 - x0) cells of the box that may be visible
+    x0: int
+    y0: int
+    x1: int
+    y1: int
+
+
+# State of a build worker process, set up once by _init_worker
+_map: Optional[np.ndarray] = None
+_settings: dict = {}
+
+
+def _init_worker(world_map: np.ndarray, settings: dict):
+    global _map, _settings
+    _map = world_map
+    _settings = settings
+
+
+def _fan_boxes(cells: np.ndarray) -> Tuple[np.ndarray, List[np.ndarray]]:
+    return visible_cells(_map, cells, _settings["samples"], _settings["rays"])
+
+
+def visible_cells(world_map: np.ndarray, cells: np.ndarray, samples: int = 4, rays: int = 512
+                  ) -> Tuple[np.ndarray, List[np.ndarray]]:
+    # Every cell a ray fan reaches from samples x samples points in each of the flat cells, up to and including the
+    # walls that stop the rays. Per cell its box (x0, y0, x1, y1) and the packed bits of the box, row by row
+    height, width = world_map.shape
+    offsets = (np.arange(samples) + 0.5) / samples
+    angles = 2 * np.pi * (np.arange(rays) + 0.5) / rays
+    start_x = np.repeat(np.tile(offsets, samples), rays)
+    start_y = np.repeat(np.repeat(offsets, samples), rays)
+    dir_x = np.tile(np.cos(angles), samples * samples)
+    dir_y = np.tile(-np.sin(angles), samples * samples)
+
+    # Without an occupancy pyramid the DDA reads every cell it crosses, the counters collect them
+    counters = TraversalCounters(world_map.shape)
+    boxes = np.zeros((len(cells), 4), dtype=np.int32)
+    packed = []
+    for row, cell in enumerate(cells):
+        cell_y, cell_x = divmod(int(cell), width)
+        counters.heatmap[:] = 0
+        cast_ray_vectors(world_map, cell_x + start_x, cell_y + start_y, dir_x, dir_y, counters=counters)
+        counters.heatmap[cell_y, cell_x] = 1
+        rows = np.flatnonzero(counters.heatmap.any(axis=1))
+        columns = np.flatnonzero(counters.heatmap.any(axis=0))
+        boxes[row] = columns[0], rows[0], columns[-1] + 1, rows[-1] + 1
+        packed.append(np.packbits(counters.heatmap[rows[0]:rows[-1] + 1, columns[0]:columns[-1] + 1] != 0))
+    return boxes, packed
+
+
+def _box_cells(box: np.ndarray, packed: np.ndarray, width: int) -> np.ndarray:
+    # Flat map indices of the cells set in a packed box
+    x0, y0, x1, y1 = (int(value) for value in box)
+    box_y, box_x = np.divmod(np.flatnonzero(np.unpackbits(packed, count=(x1 - x0) * (y1 - y0))), x1 - x0)
+    return (box_y + y0) * width + box_x + x0
+
+
+def _set_bits(bits: np.ndarray, offsets: np.ndarray, boxes: np.ndarray, width: int, rows: np.ndarray,
+              cells: np.ndarray):
+    # Mark each of the flat cells in the box of its row
+    cell_y, cell_x = np.divmod(cells, width)
+    x0, y0, x1 = boxes[rows, 0], boxes[rows, 1], boxes[rows, 2]
+    position = (cell_y - y0) * (x1 - x0) + cell_x - x0
+    np.bitwise_or.at(bits, offsets[rows] + (position >> 3), (128 >> (position & 7)).astype(np.uint8))
+
+
+def build_pvs(world_map: np.ndarray, samples: int = 4, rays: int = 512, workers: Optional[int] = None
+              ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Visible cells of every cell, cropped to their bounding box: box (x0, y0, x1, y1) and byte offset of every cell
+    # and the packed boxes one after the other. Walls see nothing. Memory grows with the result, not the square of
+    # the map
+    world_map = np.ascontiguousarray(world_map)
+    height, width = world_map.shape
+    free_flat = world_map.ravel() == 0
+    free = np.flatnonzero(free_flat)
+    workers = workers or os.cpu_count() or 1
+
+    # Free cells are split into a few tasks per worker process, so fast and slow parts of the map even out
+    tasks = [cells for cells in np.array_split(free, min(len(free), workers * 8)) if len(cells)]
+    settings = {"samples": samples, "rays": rays}
+    if workers > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(world_map, settings)) as pool:
+            parts = pool.map(_fan_boxes, tasks)
+    else:
+        parts = [visible_cells(world_map, cells, samples, rays) for cells in tasks]
+    sampled_boxes = np.concatenate([part[0] for part in parts]) if parts else np.zeros((0, 4), dtype=np.int32)
+    sampled_bits = [packed for part in parts for packed in part[1]]
+
+    def seen_cells():
+        for cell, box, packed in zip(free, sampled_boxes, sampled_bits):
+            seen = _box_cells(box, packed, width)
+            yield cell, seen, seen[free_flat[seen]]
+
+    # A sample point that sees a point of another free cell is seen by it as well, so that cell's box grows to
+    # every cell that sees it
+    boxes = np.zeros((world_map.size, 4), dtype=np.int32)
+    boxes[free] = sampled_boxes
+    for cell, _, seen_free in seen_cells():
+        cell_y, cell_x = divmod(int(cell), width)
+        boxes[seen_free, 0] = np.minimum(boxes[seen_free, 0], cell_x)
+        boxes[seen_free, 1] = np.minimum(boxes[seen_free, 1], cell_y)
+        boxes[seen_free, 2] = np.maximum(boxes[seen_free, 2], cell_x + 1)
+        boxes[seen_free, 3] = np.maximum(boxes[seen_free, 3], cell_y + 1)
+
+    # Every box starts at a byte, then the cells are set in both directions
+    box_bytes = ((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]) + 7) // 8
+    offsets = (np.cumsum(box_bytes) - box_bytes).astype(np.int64)
+    bits = np.zeros(int(box_bytes.sum()), dtype=np.uint8)
+    for cell, seen, seen_free in seen_cells():
+        _set_bits(bits, offsets, boxes, width, np.full(len(seen), cell), seen)
+        _set_bits(bits, offsets, boxes, width, seen_free, np.full(len(seen_free), cell))
+    return boxes.reshape(height, width, 4), offsets.reshape(height, width), bits
+
+
+def write_pvs(path: str, boxes: np.ndarray, offsets: np.ndarray, bits: np.ndarray, checksum: str, samples: int,
+              rays: int):
+    # A directory like a chunked map, the arrays are stored as .npy files so they can be memory mapped
+    os.makedirs(path, exist_ok=True)
+    for name, array in (("boxes", boxes), ("offsets", offsets), ("bits", bits)):
+        np.save(os.path.join(path, name + ".npy"), array)
+    with open(os.path.join(path, INDEX_FILE), "w") as file:
+        json.dump({"shape": list(offsets.shape), "checksum": checksum, "samples": samples, "rays": rays}, file)
+
+
+class PotentiallyVisibleSet:
+    def __init__(self, path: str):
+        with open(os.path.join(path, INDEX_FILE)) as file:
+            self.index = json.load(file)
+        self.shape: Tuple[int, int] = tuple(self.index["shape"])
+
+        # Only the cells that are looked up are read from disk
+        self.boxes = np.load(os.path.join(path, "boxes.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.bits = np.load(os.path.join(path, "bits.npy"), mmap_mode="r")
+
+    def cells(self, x: float, y: float) -> VisibleCells:
+        # Cells that may be visible from the cell of (x, y), only the box around them is unpacked
+        x0, y0, x1, y1 = (int(value) for value in self.boxes[int(y), int(x)])
+        offset = int(self.offsets[int(y), int(x)])
+        box_size = (x1 - x0) * (y1 - y0)
+        mask = np.unpackbits(self.bits[offset:offset + (box_size + 7) // 8], count=box_size)
+        return VisibleCells(mask.view(bool).reshape(y1 - y0, x1 - x0), x0, y0, x1, y1)
+
+    def can_see(self, x: np.ndarray, y: np.ndarray, target_x: np.ndarray, target_y: np.ndarray) -> np.ndarray:
+        # Whether the cell of every target may be visible from the cell of its source, one bit read per pair
+        cell_x, cell_y = np.asarray(x).astype(np.intp), np.asarray(y).astype(np.intp)
+        target_x, target_y = np.asarray(target_x).astype(np.intp), np.asarray(target_y).astype(np.intp)
+        x0, y0, x1, y1 = np.moveaxis(self.boxes[cell_y, cell_x], -1, 0)
+        inside = (target_x >= x0) & (target_x < x1) & (target_y >= y0) & (target_y < y1)
+
+        # Targets outside of the box read the first bit of their source's box and are masked
+        bit = np.where(inside, (target_y - y0) * (x1 - x0) + target_x - x0, 0)
+        byte = self.bits[np.minimum(self.offsets[cell_y, cell_x] + (bit >> 3), len(self.bits) - 1)]
+        return inside & ((byte >> (7 - (bit & 7)) & 1) != 0)
+
+
+def load_pvs(map_path: str, world_map: np.ndarray, samples: int = 4, rays: int = 512,
+             workers: Optional[int] = None) -> PotentiallyVisibleSet:
+    # Stored next to the map file, e.g. maps/map1.pvs/, and rebuilt when the map or the sampling has changed
+    path = os.path.splitext(map_path)[0] + ".pvs"
+    checksum = map_checksum(world_map)
+    if os.path.exists(os.path.join(path, INDEX_FILE)):
+        pvs = PotentiallyVisibleSet(path)
+        if (pvs.index["checksum"], pvs.index["samples"], pvs.index["rays"]) == (checksum, samples, rays):
+            return pvs
+
+    write_pvs(path, *build_pvs(world_map, samples, rays, workers), checksum, samples, rays)
+    return PotentiallyVisibleSet(path)
@@ -0,0 +1,97 @@
+import math
+import numpy as np
+from caster import RayHits, cast_ray_vectors
+from collections import OrderedDict
+from counters import TraversalCounters
+from occupancy import OccupancyPyramid
+from typing import Dict, Optional, Tuple
+
+
+class RayRingCache:
+    def __init__(self, ring_rays: int = 8192, sub_cells: int = 32, memory_budget: int = 32 * 1024 * 1024):
+        # Rays of a ring are spread evenly over 360 degrees, ray 0 points along direction 0
+        self.ring_rays = ring_rays
+        angles = np.arange(ring_rays) * (2 * math.pi / ring_rays)
+        self.dir_x = np.cos(angles)
+        self.dir_y = -np.sin(angles)
+
+        # Rings are cast from the centre of the sub-cell the player stands in
+        self.sub_cells = sub_cells
+
+        # Rings by sub-cell, least recently used first. Rays of a ring are cast when a view first needs them
+        self.rings: OrderedDict = OrderedDict()
+        self.ring_bytes = ring_rays * (3 * 8 + 1 + 2 * np.dtype(np.intp).itemsize + 1)
+        self.max_rings = max(1, memory_budget // self.ring_bytes)
+        self.hits = 0
+        self.misses = 0
+
+        # Version of the map the rings were cast in, any other version drops all rings
+        self.map_version: Optional[int] = None
+
+    def validate(self, map_version: int):
+        # The owner of the map bumps its version on every edit, comparing the map itself would cost O(map) per frame
+        if map_version != self.map_version:
+            self.rings.clear()
+            self.map_version = map_version
+
+    def origin(self, player_x: float, player_y: float) -> Tuple[Tuple[int, int], float, float]:
+        key = (math.floor(player_x * self.sub_cells), math.floor(player_y * self.sub_cells))
+        return key, (key[0] + 0.5) / self.sub_cells, (key[1] + 0.5) / self.sub_cells
+
+    def ring_index(self, angles: np.ndarray) -> np.ndarray:
+        # Nearest ring ray of every view ray
+        return np.rint(angles * (self.ring_rays / (2 * math.pi))).astype(np.intp) % self.ring_rays
+
+    def _new_ring(self) -> Dict[str, np.ndarray]:
+        return {
+            "known": np.zeros(self.ring_rays, dtype=bool),
+            "ray_length": np.zeros(self.ring_rays),
+            "side": np.zeros(self.ring_rays, dtype=np.int8),
+            "wall_type": np.zeros(self.ring_rays, dtype=np.intp),
+            "hit_x": np.zeros(self.ring_rays),
+            "hit_y": np.zeros(self.ring_rays),
+            "steps": np.zeros(self.ring_rays, dtype=np.intp),
+        }
+
+    def cast(self, world_map: np.ndarray, player_x: float, player_y: float, angles: np.ndarray,
+             occupancy: Optional[OccupancyPyramid] = None, distance_field: Optional[np.ndarray] = None,
+             counters: Optional[TraversalCounters] = None) -> RayHits:
+        # Hits of the rays at angles, as seen from the centre of the player's sub-cell
+        key, origin_x, origin_y = self.origin(player_x, player_y)
+        if key in self.rings:
+            self.rings.move_to_end(key)
+            self.hits += 1
+        else:
+            self.rings[key] = self._new_ring()
+            self.misses += 1
+            if len(self.rings) > self.max_rings:
+                self.rings.popitem(last=False)
+        ring = self.rings[key]
+
+        # Cast the ring rays this view needs for the first time
+        index = self.ring_index(angles)
+        missing = np.unique(index[~ring["known"][index]])
+        if len(missing):
+            hits = cast_ray_vectors(world_map, origin_x, origin_y, self.dir_x[missing], self.dir_y[missing],
+                                    occupancy, distance_field, counters)
+            for field, values in zip(RayHits._fields, hits):
+                ring[field][missing] = values
+            ring["known"][missing] = True
+
+        hits = RayHits(*(ring[field][index] for field in RayHits._fields))
+
+        # The ring ray hit its wall a little off the view ray. Move the hit along the wall line onto the view ray from
+        # the player, unless that leaves the wall cell the ring ray hit
+        dir_x = np.cos(angles)
+        dir_y = -np.sin(angles)
+        horizontal = hits.side == 0
+        line = np.rint(np.where(horizontal, hits.hit_y, hits.hit_x))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            length = np.where(horizontal, (line - player_y) / dir_y, (line - player_x) / dir_x)
+            along = np.where(horizontal, player_x + dir_x * length, player_y + dir_y * length)
+            cell = np.floor(np.where(horizontal, hits.hit_x, hits.hit_y))
+            on_wall = (length > 0) & (along >= cell) & (along <= cell + 1)
+        along = np.where(on_wall, along, np.where(horizontal, hits.hit_x, hits.hit_y))
+        return hits._replace(ray_length=np.where(on_wall, length, hits.ray_length),
+                             hit_x=np.where(horizontal, along, np.where(on_wall, line, hits.hit_x)),
+                             hit_y=np.where(horizontal, np.where(on_wall, line, hits.hit_y), along))
@@ -1,12 +1,15 @@
 import math
+import numpy as np
 import pygame
-from typing import List
+from camera import Camera
+from caster import cast_ray_vectors
+from occupancy import build_occupancy
 
 pygame.init()
 
 class Raycaster:
     def __init__(self) -> None:
-        self.map: List[List[int]] = [
+        self.map: np.ndarray = np.array([
             [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
             [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
             [1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
@@ -27,7 +30,7 @@ class Raycaster:
             [1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 0, 1, 0, 1],
             [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 1],
             [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
-        ]
+        ])
         self.WIN_X = 700
         self.WIN_Y = 650
         self.screen = pygame.display.set_mode((self.WIN_X, self.WIN_Y))
@@ -47,7 +50,8 @@ class Raycaster:
         self.LINE_WIDTH = 2
         self.NUM_RAYS = int(self.WIN_X / self.LINE_WIDTH) + 1
         self.FIELD_OF_VIEW = math.radians(50)
-        self.RAY_DENSITY = self.FIELD_OF_VIEW / (self.NUM_RAYS - 1)
+        self.camera = Camera(self.FIELD_OF_VIEW, self.NUM_RAYS)
+        self.occupancy = build_occupancy(self.map)
         self.SIZE = 800
         self.LIGHTNESS = 1000
         self.SHADOW = 2.5
@@ -113,48 +117,11 @@ class Raycaster:
         self.direction %= 2 * self.PI
 
     def draw_rays(self) -> None:
-        ray_direction = self.direction - self.FIELD_OF_VIEW / 2
-        for col in range(self.NUM_RAYS):
-            ray_block_x = int(self.player_x)
-            ray_block_y = int(self.player_y)
-
-            direction_deg = math.degrees(ray_direction) % 360
-            if direction_deg > 0 and direction_deg < 180:
-                horizontal_x = self.player_x + (self.player_y % 1) / math.tan(ray_direction)
-                delta_x = 1 / math.tan(ray_direction)
-                vz_y = -1
-            else:
-                horizontal_x = self.player_x + (self.player_y % 1 - 1) / math.tan(ray_direction)
-                delta_x = -1 / math.tan(ray_direction)
-                vz_y = 1
-
-            if direction_deg > 270 or direction_deg < 90:
-                vertical_x = math.ceil(self.player_x)
-                vz_x = 1
-            else:
-                vertical_x = math.floor(self.player_x)
-                vz_x = -1
-
-            wall = False
-            while not wall:
-                if horizontal_x * vz_x < vertical_x * vz_x:
-                    intersection_x = horizontal_x
-                    horizontal_x += delta_x
-                    ray_block_y += vz_y
-                    side = 0
-                else:
-                    intersection_x = vertical_x
-                    vertical_x += vz_x
-                    ray_block_x += vz_x
-                    side = 1
-
-                if self.map[ray_block_y][ray_block_x]:
-                    texture = self.map[ray_block_y][ray_block_x]
-                    wall = True
-
-            ray_length = (intersection_x - self.player_x) / math.cos(ray_direction)
-            distance = ray_length * math.cos(ray_direction - self.direction)
+        dir_x, dir_y = self.camera.ray_vectors(self.direction)
+        hits = cast_ray_vectors(self.map, self.player_x, self.player_y, dir_x, dir_y, self.occupancy)
+        distances = hits.ray_length * self.camera.fisheye
 
+        for col, (distance, side) in enumerate(zip(distances, hits.side)):
             line_height = self.SIZE / distance
             draw_start = (self.WIN_Y / 2) - (line_height / 2)
             if draw_start < 0:
@@ -174,8 +141,6 @@ class Raycaster:
             pygame.draw.line(self.screen, color, (col * self.LINE_WIDTH, draw_start),
                              (col * self.LINE_WIDTH, draw_end), self.LINE_WIDTH)
 
-            ray_direction += self.RAY_DENSITY
-
 if __name__ == "__main__":
     raycaster = Raycaster()
     raycaster.run()
@@ -0,0 +1,62 @@
+import numpy as np
+import struct
+from movement import move, rotate
+from typing import List, Tuple
+
+# File layout: magic, start pose and speeds, length and UTF-8 map path, then one byte of held keys per tick
+MAGIC = b"RCINPUT1"
+HEADER = struct.Struct("<5dH")
+
+# Bits of the held keys
+UP = 1
+DOWN = 2
+RIGHT = 4
+LEFT = 8
+
+
+class InputRecorder:
+    def __init__(self, path: str, map_path: str, player_x: float, player_y: float, direction: float,
+                 move_speed: float, rotation_speed: float):
+        self.path = path
+        self.header = MAGIC + HEADER.pack(player_x, player_y, direction, move_speed, rotation_speed,
+                                          len(map_path.encode("utf-8"))) + map_path.encode("utf-8")
+        self.ticks = bytearray()
+
+    def record(self, keys: int):
+        self.ticks.append(keys)
+
+    def save(self):
+        with open(self.path, "wb") as file:
+            file.write(self.header)
+            file.write(self.ticks)
+
+
+class InputReplay:
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            data = file.read()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"{path} is not an input recording")
+
+        start = len(MAGIC)
+        (self.player_x, self.player_y, self.direction, self.move_speed, self.rotation_speed,
+         path_length) = HEADER.unpack_from(data, start)
+        start += HEADER.size
+        self.map_path = data[start:start + path_length].decode("utf-8")
+        self.ticks = np.frombuffer(data, dtype=np.uint8, offset=start + path_length)
+
+    def poses(self, world_map: np.ndarray) -> List[Tuple[float, float, float]]:
+        # Pose after the input of every tick, moved and turned in the same order as the game does
+        x, y, direction = self.player_x, self.player_y, self.direction
+        poses = []
+        for keys in self.ticks.tolist():
+            if keys & UP:
+                x, y = move(world_map, x, y, direction, self.move_speed, forward=True)
+            if keys & DOWN:
+                x, y = move(world_map, x, y, direction, self.move_speed, forward=False)
+            if keys & RIGHT:
+                direction = rotate(direction, self.rotation_speed, right=True)
+            if keys & LEFT:
+                direction = rotate(direction, self.rotation_speed, right=False)
+            poses.append((x, y, direction))
+        return poses
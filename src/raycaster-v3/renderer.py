@@ -0,0 +1,175 @@
+import math
+import numpy as np
+from camera import Camera
+from caster import cast_ray_vectors
+from chunks import ChunkedMap
+from counters import TraversalCounters
+from floor import FloorCaster
+from framebuffer import Framebuffer
+from lighting import Lighting
+from observation import Observation, depth_image
+from occupancy import OccupancyPyramid, build_occupancy
+from profiler import profiler
+from ray_cache import RayRingCache
+from sprites import Sprites
+from textures import TextureAtlas
+from typing import Optional, Tuple
+
+
+def make_background(window_size: Tuple[int, int], ceiling_color: Tuple[int, int, int] = (127, 127, 255),
+                    floor_color: Tuple[int, int, int] = (60, 25, 25)) -> np.ndarray:
+    win_x, win_y = window_size
+    background = np.empty((win_x, win_y, 3), dtype=np.uint8)
+    background[:, :win_y // 2] = ceiling_color
+    background[:, win_y // 2:] = floor_color
+    return background
+
+
+class Renderer:
+    def __init__(self, world_map: np.ndarray, textures: TextureAtlas, window_size: Tuple[int, int] = (700, 650),
+                 line_width: int = 2, field_of_view: float = math.radians(50), size: float = 800,
+                 background: Optional[np.ndarray] = None, lighting: Optional[Lighting] = None,
+                 columns: Optional[Tuple[int, int]] = None, pixels: Optional[np.ndarray] = None,
+                 distance_field: Optional[np.ndarray] = None, counters: Optional[TraversalCounters] = None,
+                 ray_cache: Optional[RayRingCache] = None, floor_textures: Optional[TextureAtlas] = None,
+                 sprites: Optional[Sprites] = None, occupancy: Optional[bool] = None):
+        self.map = world_map
+        self.win_x, self.win_y = window_size
+        self.background = make_background(window_size) if background is None else background
+
+        # Rays of one frame
+        self.line_width = line_width
+        self.num_rays = int(self.win_x / self.line_width) + 1
+        self.field_of_view = field_of_view
+
+        # Optionally only the screen columns [first, last) are rendered
+        first_column, last_column = (0, self.win_x) if columns is None else columns
+        self.first_column = first_column
+        self.background = self.background[first_column:last_column]
+        first_ray = first_column // line_width
+        last_ray = (last_column - 1) // line_width + 1
+        self.camera = Camera(self.field_of_view, self.num_rays, first_ray, last_ray)
+
+        # Optionally floor and ceiling are cast per pixel row instead of showing the background
+        self.floor = None
+        if floor_textures is not None:
+            wall_texels = textures.texels if lighting is None else lighting.texels
+            self.floor = FloorCaster(floor_textures, self.win_y, size, len(wall_texels), lighting)
+
+        strip_size = (last_column - first_column, self.win_y)
+        self.framebuffer = Framebuffer(textures, strip_size, line_width, size, first_column, pixels, lighting,
+                                       None if self.floor is None else self.floor.texels)
+
+        # Depth and wall type of the last frame per screen column
+        self.depth = np.zeros(strip_size[0])
+        self.wall_ids = np.zeros(strip_size[0], dtype=np.intp)
+
+        # Built once per map so rays can leap over empty space, by default only where that is faster. Streamed maps
+        # are never read as a whole. With a distance field the rays jump by it instead
+        self.distance_field = distance_field
+        self.occupancy = None
+        if distance_field is None and not isinstance(world_map, ChunkedMap):
+            self.occupancy = build_occupancy(world_map, occupancy)
+
+        # Results of every ray of the last frame and where they were cast from
+        self.pose = (0.0, 0.0, 0.0)
+        num_cast = self.camera.last_ray - first_ray
+        self.ray_length = np.zeros(num_cast)
+        self.distances = np.zeros(num_cast)
+        self.side = np.zeros(num_cast, dtype=np.int8)
+        self.wall_type = np.zeros(num_cast, dtype=np.intp)
+        self.wall_x = np.zeros(num_cast)
+        self.ray_steps = np.zeros(num_cast, dtype=np.intp)
+        self.depth_image = np.zeros((0, num_cast), dtype=np.float32)
+
+        # Optional traversal statistics of all frames
+        self.counters = counters
+
+        # Optionally rays are served from 360 degree rings cast at quantized positions, the view then snaps to the
+        # ring's position and rays. Streamed maps are read from disk chunk by chunk and have no version, they are not
+        # cached
+        self.ray_cache = None if isinstance(world_map, ChunkedMap) else ray_cache
+
+        # Bumped by map_changed, cached rays of an older version are cast again
+        self.map_version = 0
+
+        # Entities drawn in front of the walls, their positions can change every frame
+        self.sprites = sprites
+
+    def map_changed(self):
+        # Call after editing cells of the map, a distance field passed in has to be rebuilt by the caller
+        self.map_version += 1
+        if self.occupancy is not None:
+            self.occupancy = OccupancyPyramid(self.map)
+
+    def render(self, player_x: float, player_y: float, direction: float) -> np.ndarray:
+        # Streamed maps load the chunks around the player before the rays need them
+        if isinstance(self.map, ChunkedMap):
+            with profiler.span("prefetch"):
+                self.map.prefetch(player_x, player_y)
+
+        self.cast(player_x, player_y, direction)
+        self.draw()
+
+        # (win_y, win_x, rgb) view of the framebuffer, it is overwritten by the next frame
+        return self.framebuffer.pixels.swapaxes(0, 1)
+
+    def observe(self, player_x: float, player_y: float, direction: float,
+                depth_rows: Optional[int] = None) -> Observation:
+        # Geometry of every ray without drawing, and with depth_rows a (depth_rows, rays) depth image of it. The
+        # arrays are overwritten by the next frame
+        if isinstance(self.map, ChunkedMap):
+            with profiler.span("prefetch"):
+                self.map.prefetch(player_x, player_y)
+        self.cast(player_x, player_y, direction)
+        if depth_rows is not None:
+            # Walls keep their proportions in the smaller image
+            with profiler.span("depth_image"):
+                self.depth_image = depth_image(self.distances, depth_rows, self.framebuffer.size * depth_rows
+                                               / self.win_y)
+        return Observation(self.distances, self.side, self.wall_type, self.wall_x)
+
+    def cast(self, player_x: float, player_y: float, direction: float, rays: slice = slice(None)):
+        # Cast all rays of the field of view, or a part of them, at once
+        with profiler.span("cast_rays"):
+            self.pose = (player_x, player_y, direction)
+            if self.ray_cache is not None:
+                self.ray_cache.validate(self.map_version)
+                hits = self.ray_cache.cast(self.map, player_x, player_y, direction + self.camera.offsets[rays],
+                                           self.occupancy, self.distance_field, self.counters)
+            else:
+                dir_x, dir_y = self.camera.ray_vectors(direction)
+                hits = cast_ray_vectors(self.map, player_x, player_y, dir_x[rays], dir_y[rays], self.occupancy,
+                                        self.distance_field, self.counters)
+            self.ray_steps[rays] = hits.steps
+
+            # Distance to the wall (without fisheye effect)
+            self.ray_length[rays] = hits.ray_length
+            self.distances[rays] = hits.ray_length * self.camera.fisheye[rays]
+            self.side[rays] = hits.side
+            self.wall_type[rays] = hits.wall_type
+
+            # Intersection along the wall selects the texture column
+            self.wall_x[rays] = np.where(hits.side, hits.hit_y, hits.hit_x) % 1
+
+    def draw(self, first_column: int = 0, last_column: Optional[int] = None):
+        # Draw the textured wall columns of the last cast rays into the framebuffer
+        columns = self.framebuffer.column_rays[first_column:last_column]
+        background_index = None
+        if self.floor is None:
+            with profiler.span("background"):
+                self.framebuffer.clear(self.background, first_column, last_column)
+        else:
+            with profiler.span("floor"):
+                background_index = self.floor.texel_index(*self.pose, self.camera, columns)
+        self.framebuffer.draw_walls(self.distances, self.side, self.wall_type, self.wall_x, first_column, last_column,
+                                    background_index)
+
+        self.depth[first_column:last_column] = self.distances[columns]
+        self.wall_ids[first_column:last_column] = self.wall_type[columns]
+
+        # Sprites are clipped against the wall depth of every column
+        if self.sprites is not None:
+            with profiler.span("sprites"):
+                self.sprites.draw(self.framebuffer.pixels, self.depth, self.camera, self.line_width,
+                                  self.framebuffer.size, self.first_column, *self.pose, (first_column, last_column))
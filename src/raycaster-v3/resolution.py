@@ -0,0 +1,99 @@
+import numpy as np
+from collections import deque
+from incremental import IncrementalRenderer
+from renderer import Renderer
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+# Fractions of the window size a frame can be rendered at, best first
+SCALES = (1.0, 0.75, 0.5, 0.375, 0.25)
+
+
+class ResolutionController:
+    def __init__(self, budget: float, scales: Sequence[float] = SCALES, window: int = 20, headroom: float = 0.7):
+        # Seconds a frame may take and the scales to choose from
+        self.budget = budget
+        self.scales = tuple(scales)
+        self.level = 0
+
+        # Frame times since the last change, the median of a full window decides
+        self.frame_times: deque = deque(maxlen=window)
+        self.frames = 0
+
+        # A better level must be expected to stay below headroom * budget, otherwise it would be dropped again.
+        # When it is dropped again anyway, the next try waits twice as long
+        self.headroom = headroom
+        self.patience = window
+        self.improved = False
+
+    @property
+    def scale(self) -> float:
+        return self.scales[self.level]
+
+    def update(self, frame_time: float) -> bool:
+        # True if the level changed with this frame
+        self.frame_times.append(frame_time)
+        self.frames += 1
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return False
+
+        # The cost of a frame grows about with its pixels
+        frame_time = float(np.median(self.frame_times))
+        if frame_time > self.budget and self.level < len(self.scales) - 1:
+            self.level += 1
+            if self.improved:
+                self.patience *= 2
+            self.improved = False
+        elif self.level > 0 and self.frames >= self.patience and \
+                frame_time * (self.scales[self.level - 1] / self.scale) ** 2 < self.headroom * self.budget:
+            self.level -= 1
+            self.improved = True
+        else:
+            self.improved = self.improved and self.frames < self.patience
+            return False
+        self.frame_times.clear()
+        self.frames = 0
+        return True
+
+
+class AdaptiveResolution:
+    def __init__(self, make_renderer: Callable[[Tuple[int, int], float, Optional[np.ndarray]], Renderer],
+                 window_size: Tuple[int, int], size: float, background: Optional[np.ndarray] = None,
+                 controller: Optional[ResolutionController] = None):
+        # make_renderer(window size, size, background) builds the renderer of one level
+        self.make_renderer = make_renderer
+        self.win_x, self.win_y = window_size
+        self.size = size
+        self.background = background
+        self.controller = ResolutionController(1 / 30) if controller is None else controller
+
+        # Renderers are built when their level is first used and kept for when it comes back
+        self.renderers: Dict[float, Renderer] = {}
+        self.renderer = self.level_renderer(self.controller.scale)
+
+    @property
+    def scale(self) -> float:
+        return self.controller.scale
+
+    def level_renderer(self, scale: float) -> Renderer:
+        if scale not in self.renderers:
+            window_size = (max(round(self.win_x * scale), 1), max(round(self.win_y * scale), 1))
+
+            # The background is sampled down to the level like the frame is scaled up again
+            background = None
+            if self.background is not None:
+                xs = np.arange(window_size[0]) * self.win_x // window_size[0]
+                ys = np.arange(window_size[1]) * self.win_y // window_size[1]
+                background = np.ascontiguousarray(self.background[xs][:, ys])
+            self.renderers[scale] = self.make_renderer(window_size, self.size * scale, background)
+        return self.renderers[scale]
+
+    def frame_done(self, frame_time: float) -> bool:
+        # True if the next frame is rendered at another resolution
+        if not self.controller.update(frame_time):
+            return False
+        self.renderer = self.level_renderer(self.controller.scale)
+
+        # The framebuffer of a level that is used again holds an old frame
+        if isinstance(self.renderer, IncrementalRenderer):
+            self.renderer.last_pose = None
+        return True
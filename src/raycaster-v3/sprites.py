@@ -0,0 +1,107 @@
+import math
+import numpy as np
+from camera import Camera
+from typing import Optional, Tuple
+
+# Sprites closer to the camera plane than this are not drawn
+NEAR = 0.05
+
+
+def _runs(counts: np.ndarray) -> np.ndarray:
+    # 0, 1, ..., count - 1 for every run, one run after the other
+    first = np.cumsum(counts) - counts
+    return np.arange(first[-1] + counts[-1] if len(counts) else 0, dtype=np.int32) \
+        - np.repeat(first.astype(np.int32), counts)
+
+
+class Sprites:
+    def __init__(self, images: np.ndarray, alpha_threshold: int = 128):
+        # images: (image, row, column, rgba), all square and of the same size. Only opaque texels are drawn
+        self.texture_shape = images.shape[1]
+        self.colors = np.ascontiguousarray(images[..., :3]).reshape(-1, 3)
+        self.opaque = (images[..., 3] >= alpha_threshold).reshape(-1)
+
+        # Pixels are gathered from the colors followed by a copy of the frame, like the walls in the framebuffer
+        self.source = np.zeros((0, 3), dtype=np.uint8)
+
+        # Entities in the world, their map position and image
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.image = np.zeros(0, dtype=np.intp)
+
+    def place(self, x: np.ndarray, y: np.ndarray, image: Optional[np.ndarray] = None):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.image = np.zeros(len(self.x), dtype=np.intp) if image is None else np.asarray(image, dtype=np.intp)
+
+    def draw(self, pixels: np.ndarray, depth: np.ndarray, camera: Camera, line_width: int, size: float,
+             first_column: int, player_x: float, player_y: float, direction: float,
+             columns: Tuple[int, Optional[int]] = (0, None)):
+        # Draw the sprites in front of the walls of depth into the screen columns [first, last) of pixels.
+        # first_column is the screen column of pixels[0]
+        win_x, win_y = pixels.shape[:2]
+        draw_first, draw_last = columns[0], win_x if columns[1] is None else columns[1]
+        if not len(self.x) or draw_first >= draw_last:
+            return
+
+        # Distance along the view direction, like the fisheye corrected wall distances
+        relative_x = self.x - player_x
+        relative_y = self.y - player_y
+        distance = relative_x * math.cos(direction) - relative_y * math.sin(direction)
+
+        # Screen column of the sprite centre from its angle, rays are spread evenly over the field of view
+        offset = (np.arctan2(-relative_y, relative_x) - direction + math.pi) % (2 * math.pi) - math.pi
+        center = ((offset + camera.field_of_view / 2) / camera.ray_density + 0.5) * line_width - first_column
+
+        # Sprites are one cell wide and high and stand on the floor like walls
+        visible = distance > NEAR
+        distance, center, image = distance[visible], center[visible], self.image[visible]
+        height = size / distance
+        left = center - height / 2
+        top = win_y / 2 - height / 2
+        column_start = np.clip(np.ceil(left - 0.5), draw_first, draw_last).astype(np.intp)
+        column_end = np.clip(np.ceil(left + height - 0.5), draw_first, draw_last).astype(np.intp)
+        row_start = np.clip(np.ceil(top - 0.5), 0, win_y).astype(np.intp)
+        row_end = np.clip(np.ceil(top + height - 0.5), 0, win_y).astype(np.intp)
+
+        # Far sprites first, so near sprites overwrite them
+        order = np.argsort(-distance, kind="stable")
+        order = order[(column_end[order] > column_start[order]) & (row_end[order] > row_start[order])]
+
+        # Sprite columns that are in front of the wall in their screen column
+        counts = column_end[order] - column_start[order]
+        sprite = np.repeat(order, counts)
+        column = _runs(counts) + np.repeat(column_start[order].astype(np.int32), counts)
+        in_front = distance[sprite] < depth[column]
+        sprite, column = sprite[in_front], column[in_front]
+        if not len(column):
+            return
+
+        # Texel of every sprite column in its first drawn row. Image rows follow screen rows in 16 bit fixed point
+        shape = self.texture_shape
+        scale = shape / height[sprite]
+        texture_x = np.clip(((column + 0.5 - left[sprite]) * scale).astype(np.int32), 0, shape - 1)
+        column_texel = (image[sprite] * (shape * shape)).astype(np.int32) + texture_x
+        row_step = (scale * 65536).astype(np.int32)
+        row_first = np.clip((row_start[sprite] + 0.5 - top[sprite]) * scale * 65536, 0, shape * 65536 - 1
+                            ).astype(np.int32)
+
+        # Pixels of the visible sprite columns, transparent texels are skipped
+        counts = row_end[sprite] - row_start[sprite]
+        row = _runs(counts)
+        texture_y = np.minimum((row * np.repeat(row_step, counts) + np.repeat(row_first, counts)) >> 16, shape - 1)
+        texel = np.repeat(column_texel, counts) + texture_y * shape
+        pixel = np.repeat((column * win_y + row_start[sprite]).astype(np.int32), counts) + row
+        opaque = self.opaque[texel]
+        if not opaque.all():
+            texel, pixel = texel[opaque], pixel[opaque]
+
+        # Gather the touched columns once. With repeated pixels the last, nearest sprite is assigned
+        first, last = int(column.min()) * win_y, (int(column.max()) + 1) * win_y
+        if len(self.source) < len(self.colors) + win_x * win_y:
+            self.source = np.concatenate((self.colors, np.zeros((win_x * win_y, 3), dtype=np.uint8)))
+        frame = pixels.reshape(-1, 3)[first:last]
+        self.source[len(self.colors):len(self.colors) + last - first] = frame
+        index = np.arange(len(self.colors), len(self.colors) + last - first, dtype=np.int32)
+        index[pixel - first] = texel
+        np.take(self.source, index, axis=0, out=frame)
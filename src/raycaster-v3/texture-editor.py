@@ -1,12 +1,14 @@
-import PIL
 import numpy as np
 from PIL import Image
+from textures import TextureAtlas, save_atlas
 
 img: Image.Image = Image.open("images/bricks.jpg")
-array1: np.ndarray = np.array(img.resize((100, 100), PIL.Image.ANTIALIAS))
+array1: np.ndarray = np.array(img.convert("RGB").resize((100, 100), Image.Resampling.LANCZOS))
 img: Image.Image = Image.open("images/pascal.png")
-array2: np.ndarray = np.array(img.resize((100, 100), PIL.Image.ANTIALIAS))
+array2: np.ndarray = np.array(img.convert("RGB").resize((100, 100), Image.Resampling.LANCZOS))
 img: Image.Image = Image.open("images/mario.png")
-array3: np.ndarray = np.array(img.resize((100, 100), PIL.Image.ANTIALIAS))
+array3: np.ndarray = np.array(img.convert("RGB").resize((100, 100), Image.Resampling.LANCZOS))
 
-a: np.ndarray = np.array([[array1, array1 / 2], [array3, array3 / 2], [array2, array2 / 2]])
+# One uint8 copy per texture, the renderer shades side 1 walls itself
+atlas: TextureAtlas = TextureAtlas.from_images(np.array([array1, array3, array2]))
+save_atlas("textures/textures100.npz", atlas)
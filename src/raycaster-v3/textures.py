@@ -0,0 +1,47 @@
+import numpy as np
+from typing import List
+
+
+class TextureAtlas:
+    def __init__(self, texels: np.ndarray, num_textures: int, sizes: List[int]):
+        # All mip levels of all textures as one flat (texel, rgb) uint8 array, level by level
+        self.texels = texels
+        self.num_textures = num_textures
+        self.sizes = np.asarray(sizes, dtype=np.int32)
+        self.texture_shape = int(self.sizes[0])
+
+        # Index of the first texel of every level
+        level_texels = self.num_textures * self.sizes.astype(np.int64) ** 2
+        self.offsets = np.concatenate(([0], np.cumsum(level_texels)[:-1])).astype(np.int32)
+
+    @classmethod
+    def from_images(cls, images: np.ndarray) -> "TextureAtlas":
+        # images: (texture, row, column, rgb), every texture square
+        level = np.asarray(images, dtype=np.float64)
+        levels = [level]
+        while level.shape[1] > 1:
+            # Average 2x2 blocks, an odd last row and column are dropped
+            half = level.shape[1] // 2
+            level = level[:, :half * 2, :half * 2].reshape(len(level), half, 2, half, 2, 3).mean(axis=(2, 4))
+            levels.append(level)
+
+        texels = np.concatenate([np.round(level).reshape(-1, 3) for level in levels]).astype(np.uint8)
+        return cls(texels, len(images), [level.shape[1] for level in levels])
+
+    def level(self, level: int) -> np.ndarray:
+        size = int(self.sizes[level])
+        start = int(self.offsets[level])
+        return self.texels[start:start + self.num_textures * size * size].reshape(self.num_textures, size, size, 3)
+
+
+def save_atlas(path: str, atlas: TextureAtlas):
+    np.savez(path, texels=atlas.texels, num_textures=atlas.num_textures, sizes=atlas.sizes)
+
+
+def load_atlas(path: str) -> TextureAtlas:
+    # Old float64 files hold (wall type, side, row, column, rgb) with a pre-shaded copy for side 1
+    if path.endswith(".npy"):
+        return TextureAtlas.from_images(np.load(path)[:, 0])
+
+    with np.load(path) as data:
+        return TextureAtlas(data["texels"], int(data["num_textures"]), data["sizes"].tolist())
@@ -0,0 +1,70 @@
+import numpy as np
+from caster import cast_ray_vectors
+from chunks import ChunkedMap
+from occupancy import OccupancyPyramid, build_occupancy
+from typing import NamedTuple, Optional, Union
+
+
+class Visibility(NamedTuple):
+    visible: np.ndarray   # No wall between source and target
+    distance: np.ndarray  # Distance from the source to the first wall on the way to the target, inf if visible
+
+
+class LineOfSight:
+    def __init__(self, world_map: Union[np.ndarray, ChunkedMap], occupancy: Optional[OccupancyPyramid] = None):
+        # Rays leap over empty space like the renderer's where that is faster, a renderer's pyramid of the same map
+        # can be shared
+        self.map = world_map
+        self.occupancy = occupancy
+        if occupancy is None and not isinstance(world_map, ChunkedMap):
+            self.occupancy = build_occupancy(world_map)
+
+    def query(self, source_x: np.ndarray, source_y: np.ndarray, target_x: np.ndarray,
+              target_y: np.ndarray) -> Visibility:
+        # Can every source see its target? All pairs are cast at once, each ray from its source towards its target
+        source_x, source_y, target_x, target_y = np.broadcast_arrays(
+            *(np.asarray(value, dtype=np.float64) for value in (source_x, source_y, target_x, target_y)))
+        shape = source_x.shape
+        source_x, source_y, target_x, target_y = (value.ravel() for value in (source_x, source_y, target_x, target_y))
+        visible = np.ones(len(source_x), dtype=bool)
+        distance = np.full(len(source_x), np.inf)
+
+        # Cells beyond the edge of the map count as walls: sources inside a wall see nothing and targets outside
+        # of the map are hidden behind its border
+        height, width = self.map.shape
+        source_block_x, source_block_y = np.floor(source_x).astype(np.intp), np.floor(source_y).astype(np.intp)
+        target_block_x, target_block_y = np.floor(target_x).astype(np.intp), np.floor(target_y).astype(np.intp)
+        source_inside = (source_block_x >= 0) & (source_block_x < width) & (source_block_y >= 0) \
+            & (source_block_y < height)
+        target_inside = (target_block_x >= 0) & (target_block_x < width) & (target_block_y >= 0) \
+            & (target_block_y < height)
+        in_wall = ~source_inside
+        in_wall[source_inside] = self.map[source_block_y[source_inside], source_block_x[source_inside]] != 0
+        visible[in_wall] = False
+        distance[in_wall] = 0
+
+        # Pairs in the same cell always see each other, only the others are cast
+        same_cell = (source_block_x == target_block_x) & (source_block_y == target_block_y)
+        cast = np.flatnonzero(~same_cell & ~in_wall)
+        if len(cast):
+            offset_x = target_x[cast] - source_x[cast]
+            offset_y = target_y[cast] - source_y[cast]
+            length = np.hypot(offset_x, offset_y)
+            dir_x, dir_y = offset_x / length, offset_y / length
+
+            # Rays end at their target or just before they leave the map, so they never run past the edge of a map
+            # without a wall border and do no work beyond the target
+            with np.errstate(divide="ignore", invalid="ignore"):
+                exit_x = np.where(dir_x > 0, (width - source_x[cast]) / dir_x, -source_x[cast] / dir_x)
+                exit_y = np.where(dir_y > 0, (height - source_y[cast]) / dir_y, -source_y[cast] / dir_y)
+            border = np.fmin(np.where(dir_x == 0, np.inf, exit_x), np.where(dir_y == 0, np.inf, exit_y))
+            hits = cast_ray_vectors(self.map, source_x[cast], source_y[cast], dir_x, dir_y, self.occupancy,
+                                    max_length=np.minimum(length, border - 1e-9))
+
+            # A wall at the target itself blocks it, the target is behind its face. Targets outside of the map are
+            # hidden behind its border
+            hit = hits.wall_type != 0
+            blocked = hit | ~target_inside[cast]
+            visible[cast] = ~blocked
+            distance[cast] = np.where(hit, hits.ray_length, np.where(blocked, border, np.inf))
+        return Visibility(visible.reshape(shape), distance.reshape(shape))